@@ -0,0 +1,95 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+from api.recipe_views import IngredientsViewSet, RecipesViewSet, TagsViewSet
+from api.user_views import UsersViewSet
+from recipes.connections import close_unusable_connections
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def database_sync_to_async(function):
+    """
+    Выполняет синхронную функцию, работающую с ORM, в пуле потоков.
+    В Django 3.2 нет асинхронного ORM, а синхронные представления под ASGI
+    выполняются по очереди в одном потоке; здесь запросы разных клиентов
+    идут параллельно. Соединения потока пула закрываются до и после
+    вызова по тем же правилам `CONN_MAX_AGE`, что и в конце запроса,
+    и проверяются перед вызовом, как в начале запроса.
+    """
+    def run(*args, **kwargs):
+        close_old_connections()
+        close_unusable_connections()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def render_view(view):
+    """
+    Вызывает представление DRF и рендерит ответ в том же потоке,
+    возвращая готовый `HttpResponse` с теми же кодом, причиной, кодировкой,
+    заголовками и cookies. Ответ DRF не возвращается как есть: Django
+    под ASGI рендерит такие ответы в общем потоке синхронного кода.
+    """
+    def run(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if not hasattr(response, 'render'):
+            return response
+        response.render()
+        rendered = HttpResponse(
+            response.content,
+            status=response.status_code,
+            reason=response.reason_phrase,
+            charset=response.charset,
+        )
+        for header, value in response.items():
+            rendered[header] = value
+        rendered.cookies = response.cookies
+        return rendered
+    return run
+
+
+def async_read_view(viewset, actions):
+    """
+    Асинхронное представление для маршрута `viewset` с действиями
+    `actions`: `GET` и `HEAD` выполняются вместе с рендерингом в пуле
+    потоков, остальные методы передаются синхронному представлению так же,
+    как Django вызывает синхронные представления под ASGI. Ответы
+    совпадают с ответами `viewset`.
+    """
+    view = viewset.as_view(actions)
+    read = database_sync_to_async(render_view(view))
+    write = sync_to_async(view, thread_sensitive=True)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    async_view.cls = viewset
+    async_view.actions = actions
+    async_view.csrf_exempt = True
+    return async_view
+
+
+recipe_list = async_read_view(
+    RecipesViewSet, {'get': 'list', 'post': 'create'}
+)
+recipe_detail = async_read_view(
+    RecipesViewSet,
+    {
+        'get': 'retrieve',
+        'put': 'update',
+        'patch': 'partial_update',
+        'delete': 'destroy',
+    },
+)
+tag_list = async_read_view(TagsViewSet, {'get': 'list'})
+tag_detail = async_read_view(TagsViewSet, {'get': 'retrieve'})
+ingredient_list = async_read_view(IngredientsViewSet, {'get': 'list'})
+ingredient_detail = async_read_view(IngredientsViewSet, {'get': 'retrieve'})
+subscriptions = async_read_view(UsersViewSet, {'get': 'subscriptions'})
@@ -0,0 +1,137 @@
+import asyncio
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BROTLI_QUALITY = 5
+UNCOMPRESSIBLE_TYPES = (
+    'image/', 'video/', 'audio/', 'application/pdf', 'application/zip',
+    'application/gzip',
+)
+
+
+def parse_accept_encoding(header):
+    """Разбирает `Accept-Encoding` в словарь `{кодировка: q}`."""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def get_encodings():
+    """Доступные кодировки в порядке предпочтения сервера."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(header):
+    """
+    Выбирает кодировку ответа по `Accept-Encoding`: наибольший `q`,
+    при равенстве - порядок `get_encodings()`; `None`, если клиент
+    не принимает ни одну.
+    """
+    codings = parse_accept_encoding(header)
+    best, best_quality = None, 0
+    for encoding in get_encodings():
+        quality = codings.get(encoding, codings.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+COMPRESSORS = {
+    'gzip': (compress_string, compress_sequence),
+    'br': (brotli_compress, brotli_sequence),
+}
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы gzip или brotli (если установлен пакет `brotli`)
+    по `Accept-Encoding` клиента. Ответы короче `COMPRESSION_MIN_SIZE`
+    байт, уже сжатые форматы (изображения, PDF) и ответы
+    с `Content-Encoding` отдаются как есть. Сильный `ETag` становится
+    слабым, как в `GZipMiddleware`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def is_compressible(self, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        if response.get('Content-Type', '').startswith(UNCOMPRESSIBLE_TYPES):
+            return False
+        return response.streaming or len(response.content) >= self.min_size
+
+    def compress(self, request, response):
+        if not self.is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        compress, compress_stream = COMPRESSORS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content
+            )
+            if response.has_header('Content-Length'):
+                del response['Content-Length']
+        else:
+            compressed_content = compress(response.content)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
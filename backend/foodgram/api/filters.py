@@ -1,30 +1,67 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Recipe, Tag
+from recipes.models import Recipe, RecipeTags
+from recipes.tag_slugs import tag_slug_map
 
 User = get_user_model()
 
 
+def get_tag_choices():
+    return ((slug, slug) for slug in tag_slug_map.get())
+
+
 class AuthorAndTagFilter(FilterSet):
     """
     Фильтр рецептов по тэгам и автору.
-    Фильтрация по тэгу происходит по `slug`;
+    Фильтрация по тэгу происходит по точному `slug`: слаги переводятся
+    в `id` по кешу `tag_slug_map`, а рецепты отбираются одним `EXISTS`
+    по `RecipeTags`, поэтому дубликатов в выдаче нет;
     `is_favorited` фильтрует по рецептам, которые находятся в списке избранных;
     `is_in_shopping_cart` фильтрует по рецептам, ингредиенты которых добавленны
-    в список покупок.
+    в список покупок;
+    `search` - полнотекстовый поиск по названию и описанию, рецепты
+    упорядочены по релевантности;
+    `ordering=-favorites_count` сортирует рецепты по популярности, при равной
+    популярности - по умолчанию, по индексу `recipe_favorites_count_idx`.
     """
-    tags = filters.ModelMultipleChoiceFilter(
-        lookup_expr='icontains',
-        field_name='tags__slug',
-        queryset=Tag.objects.all(),
-        to_field_name='slug',
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags',
     )
-    author = filters.ModelChoiceFilter(queryset=User.objects.all())
+    author = filters.ModelChoiceFilter(queryset=User.objects.only('id'))
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.OrderingFilter(
+        fields=('favorites_count',),
+        method='filter_ordering',
+    )
+
+    def __init__(self, data=None, *args, **kwargs):
+        super().__init__(data, *args, **kwargs)
+        if data is not None and data.getlist('tags'):
+            # Слаги тэгов, созданных другими процессами, попадают в карту
+            # до проверки `choices`.
+            tag_slug_map.get(data.getlist('tags'))
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        slug_map = tag_slug_map.get()
+        return queryset.filter(
+            Exists(
+                RecipeTags.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag_id__in=[
+                        slug_map[slug] for slug in value if slug in slug_map
+                    ],
+                )
+            )
+        )
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
@@ -36,6 +73,16 @@ class AuthorAndTagFilter(FilterSet):
             return queryset.filter(shopping_carts__user=self.request.user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return queryset.search(value)
+
+    def filter_ordering(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.order_by(*value, *Recipe._meta.ordering)
+
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
@@ -0,0 +1,337 @@
+import asyncio
+import threading
+import time
+
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+from api.response_cache import get_cache_stats
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus: границы корзин включительно."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+class EndpointMetrics:
+    """Накопленные метрики одного представления и HTTP-метода."""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = 0
+        self.serializer_seconds = 0
+        self.statuses = Counter()
+
+
+class RequestMetrics:
+    """Метрики текущего запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0
+        self.serializer_seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка `connection.execute_wrapper`: считает запросы и время."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+class MetricsRegistry:
+    """Метрики запросов, накопленные процессом."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, view, method, status, duration, request_metrics):
+        with self._lock:
+            endpoint = self._endpoints.get((view, method))
+            if endpoint is None:
+                endpoint = self._endpoints[(view, method)] = EndpointMetrics()
+            endpoint.latency.observe(duration)
+            endpoint.queries.observe(request_metrics.queries)
+            endpoint.sql_seconds += request_metrics.sql_seconds
+            endpoint.serializer_seconds += request_metrics.serializer_seconds
+            endpoint.statuses[status] += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def render(self):
+        """Возвращает метрики в текстовом формате Prometheus."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+            self._render_histograms(
+                lines, endpoints, 'latency',
+                'foodgram_request_duration_seconds',
+                'Request latency in seconds.',
+            )
+            self._render_histograms(
+                lines, endpoints, 'queries',
+                'foodgram_request_sql_queries',
+                'SQL queries per request.',
+            )
+            self._render_counters(
+                lines, endpoints, 'sql_seconds',
+                'foodgram_request_sql_seconds_total',
+                'Time spent in SQL queries in seconds.',
+            )
+            self._render_counters(
+                lines, endpoints, 'serializer_seconds',
+                'foodgram_request_serializer_seconds_total',
+                'Time spent in serializers in seconds.',
+            )
+            lines.append('# HELP foodgram_requests_total Requests by status.')
+            lines.append('# TYPE foodgram_requests_total counter')
+            for (view, method), endpoint in endpoints:
+                for status, count in sorted(endpoint.statuses.items()):
+                    labels = _labels(
+                        view=view, method=method, status=status
+                    )
+                    lines.append(
+                        f'foodgram_requests_total{{{labels}}} {count}'
+                    )
+        lines.append(
+            '# HELP foodgram_response_cache_total Response cache lookups.'
+        )
+        lines.append('# TYPE foodgram_response_cache_total counter')
+        for key, count in sorted(get_cache_stats().items()):
+            name, outcome = key.rsplit('_', 1)
+            labels = _labels(cache=name, outcome=outcome)
+            lines.append(f'foodgram_response_cache_total{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms(lines, endpoints, attr, metric, help_text):
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for (view, method), endpoint in endpoints:
+            histogram = getattr(endpoint, attr)
+            for bound, count in histogram.cumulative():
+                labels = _labels(view=view, method=method, le=bound)
+                lines.append(f'{metric}_bucket{{{labels}}} {count}')
+            labels = _labels(view=view, method=method)
+            lines.append(f'{metric}_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+    @staticmethod
+    def _render_counters(lines, endpoints, attr, metric, help_text):
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for (view, method), endpoint in endpoints:
+            labels = _labels(view=view, method=method)
+            lines.append(f'{metric}{{{labels}}} {getattr(endpoint, attr)}')
+
+
+def _labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+                '\n', r'\n'
+            ),
+        )
+        for name, value in labels.items()
+    )
+
+
+registry = MetricsRegistry()
+
+
+def get_view_name(request):
+    """
+    Имя представления для меток: `RecipesViewSet.list`,
+    `RecipesViewSet.download_shopping_cart`; для представлений не DRF -
+    имя маршрута.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match._func_path
+    action = (getattr(match.func, 'actions', None) or {}).get(
+        request.method.lower()
+    )
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+@lru_cache(maxsize=None)
+def _timed_serializer_class(serializer_class):
+    """Подкласс сериализатора, свойство `data` которого замеряет время."""
+
+    class TimedSerializer(serializer_class):
+
+        @property
+        def data(self):
+            start = time.perf_counter()
+            try:
+                return super().data
+            finally:
+                request_metrics = _current.get()
+                if request_metrics is not None:
+                    request_metrics.serializer_seconds += (
+                        time.perf_counter() - start
+                    )
+
+    TimedSerializer.__name__ = serializer_class.__name__
+    TimedSerializer.__qualname__ = serializer_class.__qualname__
+    return TimedSerializer
+
+
+class SerializerMetricsMixin:
+    """
+    Примесь представления DRF: время `serializer.data` сериализатора,
+    созданного `get_serializer` или переданного в `measure_serializer`,
+    учитывается в метриках запроса. Вложенные сериализаторы входят во время
+    внешнего. Классы сериализаторов не изменяются: замеряются только
+    экземпляры представления при включённых метриках.
+    """
+
+    def measure_serializer(self, serializer):
+        if _current.get() is not None:
+            serializer.__class__ = _timed_serializer_class(type(serializer))
+        return serializer
+
+    def get_serializer(self, *args, **kwargs):
+        return self.measure_serializer(
+            super().get_serializer(*args, **kwargs)
+        )
+
+
+def _record_query(execute, sql, params, many, context):
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    return request_metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(sender=None, connection=None, **kwargs):
+    """
+    Обработчик `connection_created`: добавляет соединению обёртку,
+    которая передаёт запросы метрикам текущего запроса.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def instrument_connections():
+    """
+    Подключает учёт SQL ко всем соединениям, в том числе открытым
+    в других потоках: метрики запроса берутся из контекста, который
+    `sync_to_async` переносит в поток пула.
+    """
+    connection_created.connect(
+        instrument_connection, dispatch_uid='metrics_instrument_connection'
+    )
+    for db_connection in connections.all():
+        instrument_connection(connection=db_connection)
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики запросов по представлению и действию: гистограммы
+    времени ответа и числа SQL-запросов, время SQL и сериализаторов.
+    SQL учитывается обёрткой `execute_wrappers` соединений, сериализаторы -
+    примесью представлений `SerializerMetricsMixin`, поэтому
+    накладные расходы - несколько замеров времени на запрос. Запросы,
+    выполняемые при отдаче потокового ответа, в метрики не попадают.
+    Работает и под WSGI, и под ASGI без перехода в поток.
+    Отключается настройкой `METRICS_ENABLED`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_connections()
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, start, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, start, request_metrics)
+        return response
+
+    def record(self, request, response, start, request_metrics):
+        registry.record(
+            get_view_name(request),
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            request_metrics,
+        )
+
+
+class MetricsView(APIView):
+    """Метрики процесса в формате Prometheus, только для персонала."""
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,113 @@
+from django.core.files.storage import default_storage
+from django.db.models import BooleanField, Exists, F, OuterRef, Value
+
+from recipes.models import IngredientAmount, RecipeTags
+from users.models import Follow
+
+IMAGE_FIELDS = ('image', 'image_card', 'image_thumbnail', 'image_card_webp')
+RECIPE_FIELDS = (
+    'id', 'name', 'text', *IMAGE_FIELDS, 'cooking_time', 'favorites_count',
+    'pub_date', 'author_id',
+)
+AUTHOR_FIELDS = {
+    'author_email': F('author__email'),
+    'author_username': F('author__username'),
+    'author_first_name': F('author__first_name'),
+    'author_last_name': F('author__last_name'),
+}
+
+
+def get_recipe_rows(queryset, user):
+    """
+    Переводит queryset рецептов `RecipesViewSet` в `values()` с полями
+    рецепта, автора и аннотациями queryset (`is_favorited`,
+    `is_in_shopping_cart`, `search_rank`), добавляя флаг подписки
+    на автора `author_is_subscribed`.
+    """
+    if user.is_authenticated:
+        is_subscribed = Exists(
+            Follow.objects.filter(user=user, author=OuterRef('author_id'))
+        )
+    else:
+        is_subscribed = Value(False, output_field=BooleanField())
+    queryset = queryset.prefetch_related(None).annotate(
+        author_is_subscribed=is_subscribed
+    )
+    return queryset.values(
+        *RECIPE_FIELDS, *queryset.query.annotations, **AUTHOR_FIELDS
+    )
+
+
+def build_recipe_list(rows, request):
+    """
+    Собирает из строк `get_recipe_rows` данные в формате
+    `RecipesForReadingSerializer` двумя запросами - тэги и ингредиенты
+    всех рецептов - без создания моделей и сериалайзеров.
+    """
+    recipe_ids = [row['id'] for row in rows]
+    tags = {recipe_id: [] for recipe_id in recipe_ids}
+    tag_data = {}
+    for recipe_id, tag_id, name, color, slug in RecipeTags.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('tag__name').values_list(
+        'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+    ):
+        tag = tag_data.get(tag_id)
+        if tag is None:
+            tag = tag_data[tag_id] = {
+                'id': tag_id, 'name': name, 'color': color, 'slug': slug,
+            }
+        tags[recipe_id].append(tag)
+    ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, ingredient_id, name, unit, amount in (
+        IngredientAmount.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('id').values_list(
+            'recipe_id', 'ingredient_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        )
+    ):
+        ingredients[recipe_id].append({
+            'id': ingredient_id,
+            'name': name,
+            'measurement_unit': unit,
+            'amount': amount,
+        })
+    urls = {}
+
+    def get_url(name):
+        if not name:
+            return None
+        url = urls.get(name)
+        if url is None:
+            url = urls[name] = request.build_absolute_uri(
+                default_storage.url(name)
+            )
+        return url
+
+    return [
+        {
+            'id': row['id'],
+            'tags': tags[row['id']],
+            'author': {
+                'email': row['author_email'],
+                'id': row['author_id'],
+                'username': row['author_username'],
+                'first_name': row['author_first_name'],
+                'last_name': row['author_last_name'],
+                'is_subscribed': row['author_is_subscribed'],
+            },
+            'ingredients': ingredients[row['id']],
+            'is_favorited': row['is_favorited'],
+            'is_in_shopping_cart': row['is_in_shopping_cart'],
+            'name': row['name'],
+            'text': row['text'],
+            'image': get_url(row['image']),
+            'image_card': get_url(row['image_card']),
+            'image_thumbnail': get_url(row['image_thumbnail']),
+            'image_card_webp': get_url(row['image_card_webp']),
+            'cooking_time': row['cooking_time'],
+            'favorites_count': row['favorites_count'],
+        }
+        for row in rows
+    ]
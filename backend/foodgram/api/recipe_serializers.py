@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch, prefetch_related_objects
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
@@ -8,8 +8,9 @@ from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 from api.user_serializers import CustomUserSerializer, RecipeMinifiedSerializer
 from recipes.models import (
     Favorites, Ingredient, IngredientAmount, Recipe, RecipeTags, ShoppingCart,
-    Tag,
+    ShoppingListExport, Tag,
 )
+from recipes.shopping_list import refresh_recipe_shopping_lists
 
 User = get_user_model()
 
@@ -70,7 +71,8 @@ class RecipesForReadingSerializer(serializers.ModelSerializer):
     текущего пользователя, если пользователь не зарегистрирован - выведет
     False;
     `is_in_shopping_cart: boolean` - находится ли ингредиенты рецепта в списке
-    для покупок.
+    для покупок;
+    `favorites_count: integer` - сколько раз рецепт добавлен в избранное.
     """
 
     author = CustomUserSerializer(read_only=True)
@@ -96,22 +98,23 @@ class RecipesForReadingSerializer(serializers.ModelSerializer):
             'is_favorited',
             'is_in_shopping_cart',
             'name', 'text',
-            'image', 'cooking_time',
+            'image', 'image_card', 'image_thumbnail', 'image_card_webp',
+            'cooking_time', 'favorites_count',
         )
 
     def get_is_favorited(self, obj):
-        """Находится ли рецепт в списке избранном текущего пользователя."""
-        current_user = self.context.get('request').user
-        if not current_user.is_authenticated:
-            return False
-        return current_user.favorites.filter(recipe=obj).exists()
+        """
+        Находится ли рецепт в списке избранном текущего пользователя.
+        Значение берётся из аннотации queryset `RecipesViewSet`.
+        """
+        return getattr(obj, 'is_favorited', False)
 
     def get_is_in_shopping_cart(self, obj):
-        """Находиться ли рецепт в списке покупок текущего пользователя."""
-        current_user = self.context.get('request').user
-        if not current_user.is_authenticated:
-            return False
-        return current_user.shopping_carts.filter(recipe=obj).exists()
+        """
+        Находиться ли рецепт в списке покупок текущего пользователя.
+        Значение берётся из аннотации queryset `RecipesViewSet`.
+        """
+        return getattr(obj, 'is_in_shopping_cart', False)
 
 
 class RecipesForWritingSerializer(serializers.ModelSerializer):
@@ -143,18 +146,18 @@ class RecipesForWritingSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
-        """Находится ли рецепт в списке избранном текущего пользователя."""
-        current_user = self.context.get('request').user
-        if not current_user.is_authenticated:
-            return False
-        return current_user.favorites.filter(recipe=obj).exists()
+        """
+        Находится ли рецепт в списке избранном текущего пользователя.
+        Значение берётся из аннотации queryset `RecipesViewSet`.
+        """
+        return getattr(obj, 'is_favorited', False)
 
     def get_is_in_shopping_cart(self, obj):
-        """Находиться ли рецепт в списке покупок текущего пользователя."""
-        current_user = self.context.get('request').user
-        if not current_user.is_authenticated:
-            return False
-        return current_user.shopping_carts.filter(recipe=obj).exists()
+        """
+        Находиться ли рецепт в списке покупок текущего пользователя.
+        Значение берётся из аннотации queryset `RecipesViewSet`.
+        """
+        return getattr(obj, 'is_in_shopping_cart', False)
 
     def validate(self, data):
         ingredients = data.get('ingredient_amounts')
@@ -170,24 +173,83 @@ class RecipesForWritingSerializer(serializers.ModelSerializer):
                     'Проверьте, что ингредиенты не повторяются'
                 )
             ingredient_set.add(ingredient_id)
+        missing_ids = ingredient_set.difference(
+            Ingredient.objects.filter(
+                id__in=ingredient_set
+            ).values_list('id', flat=True)
+        )
+        if missing_ids:
+            raise serializers.ValidationError({
+                'ingredients': (
+                    'Ингредиенты не найдены: '
+                    f'{", ".join(map(str, sorted(missing_ids)))}'
+                )
+            })
         return data
 
-    def _write_tags(self, recipe, tags):
-        recipe_tags = (
-            RecipeTags(recipe=recipe, tag=tag) for tag in set(tags))
-        RecipeTags.objects.bulk_create(recipe_tags)
+    def _write_tags(self, recipe, tags, current_tag_ids=frozenset()):
+        """
+        Добавляет новые тэги рецепта и удаляет отсутствующие в `tags`.
+        `current_tag_ids` - множество `id` текущих тэгов рецепта.
+        """
+        tag_ids = {tag.id for tag in tags}
+        RecipeTags.objects.filter(
+            recipe=recipe, tag_id__in=current_tag_ids - tag_ids
+        ).delete()
+        RecipeTags.objects.bulk_create(
+            RecipeTags(recipe=recipe, tag_id=tag_id)
+            for tag_id in tag_ids - current_tag_ids
+        )
 
-    def _write_ingredients(self, recipe, ingredients):
-        for ingredient in ingredients:
-            current_ingredient = get_object_or_404(
-                Ingredient,
-                id=ingredient.get('ingredient').get('id')
+    def _write_ingredients(self, recipe, ingredients, current_amounts=None):
+        """
+        Приводит ингредиенты рецепта к `ingredients`: создаёт новые записи,
+        обновляет изменившиеся количества и удаляет лишние.
+        `current_amounts` - текущие записи рецепта по `id` ингредиента.
+        """
+        current_amounts = current_amounts or {}
+        amounts = {
+            ingredient['ingredient']['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        IngredientAmount.objects.filter(
+            recipe=recipe, ingredient_id__in=current_amounts.keys() - amounts
+        ).delete()
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
             )
-            IngredientAmount.objects.create(
-                recipe=recipe,
-                ingredient=current_ingredient,
-                amount=ingredient.get('amount')
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current_amounts
+        )
+        changed_amounts = [
+            current_amounts[ingredient_id]
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id in current_amounts
+            and current_amounts[ingredient_id].amount != amount
+        ]
+        for ingredient_amount in changed_amounts:
+            ingredient_amount.amount = amounts[ingredient_amount.ingredient_id]
+        IngredientAmount.objects.bulk_update(changed_amounts, ('amount',))
+        # bulk-операции не отправляют сигналы, поэтому списки покупок
+        # для созданных и изменённых записей обновляются явно.
+        refresh_recipe_shopping_lists(
+            recipe.id,
+            (
+                *(amounts.keys() - current_amounts.keys()),
+                *(amount.ingredient_id for amount in changed_amounts),
+            )
+        )
+
+    def to_representation(self, instance):
+        prefetch_related_objects(
+            (instance,),
+            Prefetch(
+                'ingredient_amounts',
+                queryset=IngredientAmount.objects.select_related('ingredient')
             )
+        )
+        return super().to_representation(instance)
 
     @transaction.atomic
     def create(self, validated_data):
@@ -203,10 +265,19 @@ class RecipesForWritingSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredient_amounts')
         recipe = super().update(recipe, validated_data)
-        recipe.tags.clear()
-        recipe.ingredients.clear()
-        self._write_tags(recipe, tags)
-        self._write_ingredients(recipe, ingredients)
+        self._write_tags(
+            recipe,
+            tags,
+            set(recipe.recipe_tags.values_list('tag_id', flat=True))
+        )
+        self._write_ingredients(
+            recipe,
+            ingredients,
+            {
+                amount.ingredient_id: amount
+                for amount in recipe.ingredient_amounts.all()
+            }
+        )
         return recipe
 
 
@@ -258,3 +329,17 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
             instance=self.validated_data.get('recipe')
         ).data)
         return ret
+
+
+class ShoppingListExportSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор задания на выгрузку списка покупок.
+    Ссылка на файл появляется, когда задание в статусе `done`.
+    """
+
+    class Meta:
+        model = ShoppingListExport
+        fields = ('id', 'format', 'status', 'file', 'error', 'created',
+                  'finished')
+        read_only_fields = ('status', 'file', 'error', 'created',
+                            'finished')
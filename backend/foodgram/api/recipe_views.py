@@ -1,51 +1,114 @@
+import os
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import F, Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status
+from rest_framework import mixins, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.viewsets import (
+    GenericViewSet, ModelViewSet, ReadOnlyModelViewSet,
+)
 
 from api.filters import AuthorAndTagFilter
+from api.metrics import SerializerMetricsMixin
+from api.recipe_projections import build_recipe_list, get_recipe_rows
 from api.recipe_serializers import (
     FavoritesSerializer, IngredientsSerializer, RecipesForReadingSerializer,
-    RecipesForWritingSerializer, ShoppingCartSerializer, TagsSerializer,
+    RecipesForWritingSerializer, ShoppingCartSerializer,
+    ShoppingListExportSerializer, TagsSerializer,
+)
+from api.renderers import (
+    CSVRenderer, FallbackContentNegotiation, PDFRenderer, PlainTextRenderer,
+)
+from api.response_cache import cache_anonymous_response, conditional_response
+from api.utilits import LimitPageOrKeysetPagination
+from recipes.cache import INGREDIENTS, RECIPES, TAGS
+from recipes.favorites import refresh_favorites_count
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (
+    Favorites, Ingredient, Recipe, ShoppingCart, ShoppingListExport, Tag,
+)
+from recipes.shopping_list import get_shopping_list
+from recipes.shopping_list_files import (
+    get_shopping_cart_pdf, iter_shopping_cart_csv, iter_shopping_cart_txt,
 )
-from api.utilits import LimitPagePagination, get_shopping_cart_pdf
-from recipes.models import Favorites, Ingredient, Recipe, ShoppingCart, Tag
 from users.permissions import AuthorOrReadOnly
 
-CONTENT_TYPE = 'application/pdf'
+SHOPPING_CART_WRITERS = {
+    PlainTextRenderer.format: iter_shopping_cart_txt,
+    CSVRenderer.format: iter_shopping_cart_csv,
+}
 User = get_user_model()
 
 
-class TagsViewSet(ReadOnlyModelViewSet):
+def refresh_cached_recipes(data):
+    """
+    Обновляет `favorites_count` в закешированном рецепте или странице
+    рецептов: счётчик меняется без смены поколения рецептов.
+    """
+    if isinstance(data, dict):
+        data = data.get('results', [data])
+    refresh_favorites_count(data)
+
+
+def is_popularity_ordering(request):
+    return 'favorites_count' in request.query_params.get('ordering', '')
+
+
+class TagsViewSet(SerializerMetricsMixin, ReadOnlyModelViewSet):
     """Представление тэгов рецептов."""
     serializer_class = TagsSerializer
     queryset = Tag.objects.all()
 
+    @conditional_response(TAGS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class IngredientsViewSet(ReadOnlyModelViewSet):
+    @conditional_response(TAGS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class IngredientsViewSet(SerializerMetricsMixin, ReadOnlyModelViewSet):
     """Представление иногредиентов рецептов."""
     serializer_class = IngredientsSerializer
     queryset = Ingredient.objects.all()
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('name',)
 
+    @conditional_response(INGREDIENTS)
+    def list(self, request, *args, **kwargs):
+        """
+        Поиск ингредиентов по параметру `name` выполняется по индексу
+        в памяти: сначала совпадения по началу названия, затем по вхождению.
+        """
+        return Response(
+            ingredient_index.search(request.query_params.get('name', ''))
+        )
+
+    @conditional_response(INGREDIENTS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-class RecipesViewSet(ModelViewSet):
+
+class RecipesViewSet(SerializerMetricsMixin, ModelViewSet):
     """Представление рецептов."""
 
     queryset = Recipe.objects.all()
-    pagination_class = LimitPagePagination
+    pagination_class = LimitPageOrKeysetPagination
     permission_classes = (AuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = AuthorAndTagFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset().with_user_flags(self.request.user)
+        if self.action in ('retrieve', 'list'):
+            return queryset.with_related()
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -54,6 +117,33 @@ class RecipesViewSet(ModelViewSet):
             return RecipesForReadingSerializer
         return RecipesForWritingSerializer
 
+    @cache_anonymous_response(
+        RECIPES,
+        refresh=refresh_cached_recipes,
+        bypass=is_popularity_ordering,
+    )
+    def list(self, request, *args, **kwargs):
+        """
+        Порядок по популярности зависит от `favorites_count`, который
+        меняется без смены поколения рецептов, поэтому такие списки
+        не кешируются.
+        При включённой настройке `RECIPE_LIST_FAST_PATH` список собирается
+        из `values()` без `RecipesForReadingSerializer`, в том же формате.
+        """
+        if not settings.RECIPE_LIST_FAST_PATH:
+            return super().list(request, *args, **kwargs)
+        rows = get_recipe_rows(
+            self.filter_queryset(self.get_queryset()), request.user
+        )
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(build_recipe_list(list(rows), request))
+        return self.get_paginated_response(build_recipe_list(page, request))
+
+    @cache_anonymous_response(RECIPES, refresh=refresh_cached_recipes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(
         detail=True,
         methods=('post',),
@@ -64,10 +154,10 @@ class RecipesViewSet(ModelViewSet):
         Добавление рецепта в список избранных рецептов.
         """
         recipe = get_object_or_404(Recipe, pk=pk)
-        serializer = FavoritesSerializer(data={
+        serializer = self.measure_serializer(FavoritesSerializer(data={
             'recipe': recipe.id,
             'user': request.user.id
-        })
+        }))
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(
@@ -98,19 +188,21 @@ class RecipesViewSet(ModelViewSet):
         detail=True,
         permission_classes=(permissions.IsAuthenticated,),
     )
+    @transaction.atomic
     def shopping_cart(self, request, pk):
         """
         Добавление(удаление) ингредиентов рецепта в(из) список(ка) покупок.
         """
         recipe = get_object_or_404(Recipe, pk=pk)
-        serializer = ShoppingCartSerializer(
+        serializer = self.measure_serializer(ShoppingCartSerializer(
             data={'recipe': recipe.id, 'user': request.user.id}
-        )
+        ))
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @shopping_cart.mapping.delete
+    @transaction.atomic
     def del_from_shopping_cart(self, request, pk):
         """
         Удаление ингредиентов рецепта из списока покупок.
@@ -129,16 +221,53 @@ class RecipesViewSet(ModelViewSet):
 
     @action(
         detail=False,
-        permission_classes=(permissions.IsAuthenticated,)
+        permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=(PDFRenderer, PlainTextRenderer, CSVRenderer),
+        content_negotiation_class=FallbackContentNegotiation,
     )
     def download_shopping_cart(self, request):
-        """Скачивание списка покупок."""
-        shopping_cart_queryset = request.user.shopping_carts.values(
-            name=F('recipe__ingredient_amounts__ingredient__name'),
-            unit=F('recipe__ingredient_amounts__ingredient__measurement_unit')
-        ).annotate(amount=Sum('recipe__ingredient_amounts__amount'))
-        response = HttpResponse(content_type=CONTENT_TYPE)
+        """
+        Скачивание списка покупок.
+        Формат файла выбирается параметром `format` (`pdf`, `txt`, `csv`)
+        или заголовком `Accept`, по умолчанию и при неподходящем `Accept` -
+        PDF. Текстовые форматы отдаются потоком, не собирая файл целиком
+        в памяти.
+        """
+        shopping_cart_queryset = get_shopping_list(request.user)
+        renderer = request.accepted_renderer
+        if renderer.format == PDFRenderer.format:
+            response = HttpResponse(content_type=renderer.media_type)
+            get_shopping_cart_pdf(shopping_cart_queryset, response)
+        else:
+            response = StreamingHttpResponse(
+                SHOPPING_CART_WRITERS[renderer.format](
+                    shopping_cart_queryset.iterator()
+                ),
+                content_type=f'{renderer.media_type}; '
+                             f'charset={renderer.charset}'
+            )
+        filename = os.path.splitext(settings.UPLOAD_FILE_NAME)[0]
         response['Content-Disposition'] = (
-            f'attachment; filename={settings.UPLOAD_FILE_NAME}'
+            f'attachment; filename={filename}.{renderer.format}'
         )
-        return get_shopping_cart_pdf(shopping_cart_queryset, response)
+        return response
+
+
+class ShoppingListExportViewSet(SerializerMetricsMixin,
+                                mixins.CreateModelMixin,
+                                mixins.RetrieveModelMixin,
+                                GenericViewSet):
+    """
+    Фоновая выгрузка списка покупок.
+    `POST` ставит задание в очередь и возвращает его `id`, файл создаёт
+    обработчик `python manage.py run_export_worker`. `GET` по `id`
+    возвращает статус задания и ссылку на готовый файл.
+    """
+    serializer_class = ShoppingListExportSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        return ShoppingListExport.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
@@ -0,0 +1,102 @@
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson is not None else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на `orjson` для компактного режима с `UNICODE_JSON`.
+    Типы, которые `orjson` не знает (`Decimal`, даты, ленивые строки),
+    передаются `encoders.JSONEncoder`, `U+2028` и `U+2029` экранируются,
+    поэтому ответы API совпадают с `JSONRenderer`. Вывод не идентичен
+    для произвольных данных: `orjson` записывает числа с плавающей точкой
+    иначе (`1e16` вместо `1e+16`), а `NaN` и `Infinity` - как `null`,
+    тогда как `JSONRenderer` со `STRICT_JSON` их отклоняет.
+    Без `orjson`, с `ensure_ascii`, для запросов с отступами (`indent`
+    в `Accept`, Browsable API) и для данных, которые `orjson` не может
+    записать (целые больше 64 бит, ключи словаря неподдерживаемых типов),
+    работает `JSONRenderer`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or not self.compact or self.ensure_ascii
+            or self.get_indent(
+                accepted_media_type, renderer_context or {}
+            ) is not None
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=ORJSON_OPTIONS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    """
+    Базовый рендерер файлов списка покупок.
+    Файл формирует само представление, поэтому через рендерер проходят
+    только ответы с ошибками - они отдаются в JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = JSONRenderer.media_type
+        return FastJSONRenderer().render(data)
+
+
+class PDFRenderer(ShoppingCartRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+class PlainTextRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+
+class CSVRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+class FallbackContentNegotiation(DefaultContentNegotiation):
+    """
+    Выбор рендерера с запасным вариантом: если заголовок `Accept`
+    не подходит ни одному рендереру (например, `application/json`),
+    используется первый из них вместо ответа 406. Неизвестный `format`
+    по-прежнему даёт 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            return renderers[0], renderers[0].media_type
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from recipes.cache import get_generation, get_version
+
+CACHE_KEY = 'response:{name}:{generation}:{digest}'
+
+_stats_lock = threading.Lock()
+_stats = Counter()
+
+
+def get_cache_stats():
+    """Возвращает счётчики попаданий и промахов кеша ответов процесса."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name, outcome):
+    with _stats_lock:
+        _stats[f'{name}_{outcome}'] += 1
+
+
+def _get_request_digest(request):
+    return hashlib.md5(
+        '|'.join((
+            request.get_host(),
+            request.get_full_path(),
+            request.accepted_renderer.format,
+        )).encode()
+    ).hexdigest()
+
+
+def get_cache_key(name, request):
+    """
+    Ключ ответа: поколение данных `name`, хост, путь с параметрами
+    запроса и формат ответа.
+    """
+    return CACHE_KEY.format(
+        name=name,
+        generation=get_generation(name),
+        digest=_get_request_digest(request)
+    )
+
+
+def cache_anonymous_response(name, refresh=None, bypass=None):
+    """
+    Кеширует успешные ответы метода представления для анонимных
+    пользователей. Ключ содержит поколение данных `name`, поэтому
+    изменение данных делает устаревшими все закешированные ответы.
+    `refresh(data)` обновляет в закешированных данных часто меняющиеся
+    поля, не меняя поколение; запросы, для которых `bypass(request)`
+    истинно, не кешируются.
+    В заголовке `X-Cache` возвращается `HIT` или `MISS`.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.user.is_authenticated or (
+                bypass is not None and bypass(request)
+            ):
+                return view_method(self, request, *args, **kwargs)
+            key = get_cache_key(name, request)
+            data = cache.get(key)
+            if data is not None:
+                _count(name, 'hits')
+                if refresh is not None:
+                    refresh(data)
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+            _count(name, 'misses')
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(
+                    key, response.data, settings.RESPONSE_CACHE_TIMEOUT
+                )
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_response(name):
+    """
+    Добавляет к ответу метода представления заголовки `ETag`,
+    `Last-Modified` и `Cache-Control`. `ETag` строится из поколения данных
+    `name` в базе и параметров запроса, `Last-Modified` - время изменения
+    этого поколения, поэтому запрос с `If-None-Match` или
+    `If-Modified-Since` для неизменившихся данных получает ответ 304
+    без сериализации.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            version = get_version(name)
+            etag = quote_etag(
+                f'{name}-{version.generation}-'
+                f'{_get_request_digest(request)}'
+            )
+            last_modified = int(version.modified.timestamp())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(
+                response, public=True, max_age=settings.REFERENCE_MAX_AGE
+            )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,27 @@
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from api.async_views import render_view
+from api.renderers import FastJSONRenderer
+
+
+def drf_view(request):
+    response = Response({'id': 1}, status=201)
+    response.reason_phrase = 'Made'
+    response.set_cookie('seen', 'yes')
+    response['X-Extra'] = 'value'
+    response.accepted_renderer = FastJSONRenderer()
+    response.accepted_media_type = FastJSONRenderer.media_type
+    response.renderer_context = {}
+    return response
+
+
+def test_render_view_keeps_response_details(rf):
+    """Готовый ответ сохраняет код, причину, заголовки и cookies."""
+    rendered = render_view(drf_view)(rf.get('/'))
+    assert type(rendered) is HttpResponse
+    assert rendered.status_code == 201
+    assert rendered.reason_phrase == 'Made'
+    assert rendered.cookies['seen'].value == 'yes'
+    assert rendered['X-Extra'] == 'value'
+    assert rendered.content == b'{"id":1}'
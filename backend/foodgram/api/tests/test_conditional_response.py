@@ -0,0 +1,47 @@
+from recipes.cache import TAGS, bump_generation
+from recipes.models import Tag
+
+
+def test_etag_follows_database_version(recipes, anonymous_client):
+    """
+    `ETag` берётся из версии данных в базе: с отключённым кешем ответ 304
+    отдаётся только до изменения тэгов, в том числе сделанного другим
+    процессом.
+    """
+    url = '/api/tags/'
+    etag = anonymous_client.get(url)['ETag']
+    assert anonymous_client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304
+    Tag.objects.create(name='новый', color='#000000', slug='new')
+    response = anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    etag = response['ETag']
+    bump_generation(TAGS)
+    assert anonymous_client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == 200
+
+
+def test_author_change_invalidates_cached_recipes(
+    settings, recipes, anonymous_client
+):
+    """Изменение имени автора видно в закешированном списке рецептов."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'author-change',
+        },
+    }
+    url = '/api/recipes/?limit=50'
+    anonymous_client.get(url)
+    assert anonymous_client.get(url)['X-Cache'] == 'HIT'
+    author = recipes[0].author
+    author.first_name = 'Новое имя'
+    author.save()
+    response = anonymous_client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert 'Новое имя' in response.content.decode()
+    author.save(update_fields=('last_login',))
+    assert anonymous_client.get(url)['X-Cache'] == 'HIT'
@@ -0,0 +1,53 @@
+from recipes.cache import RECIPES, get_generation
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'favorites',
+    },
+}
+
+
+def test_favorite_updates_count_without_invalidating_cache(
+    recipes, user_client
+):
+    """
+    Добавление в избранное и удаление из него меняют `favorites_count`,
+    но не поколение закешированных ответов с рецептами.
+    """
+    recipe = recipes[1]
+    generation = get_generation(RECIPES)
+    url = f'/api/recipes/{recipe.id}/favorite/'
+    assert user_client.post(url).status_code == 201
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 1
+    assert user_client.delete(url).status_code == 204
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 0
+    assert get_generation(RECIPES) == generation
+
+
+def test_cached_recipes_show_current_favorites_count(
+    settings, recipes, anonymous_client, user_client
+):
+    """
+    Закешированные список и рецепт отдаются с текущим `favorites_count`,
+    список по популярности не кешируется.
+    """
+    settings.CACHES = LOCMEM_CACHES
+    recipe = recipes[1]
+    urls = ('/api/recipes/?limit=50', f'/api/recipes/{recipe.id}/')
+    for url in urls:
+        anonymous_client.get(url)
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    listed, detail = (anonymous_client.get(url) for url in urls)
+    assert listed['X-Cache'] == detail['X-Cache'] == 'HIT'
+    counts = {
+        item['id']: item['favorites_count']
+        for item in listed.json()['results']
+    }
+    assert counts[recipe.id] == detail.json()['favorites_count'] == 1
+    popular = anonymous_client.get(
+        '/api/recipes/?ordering=-favorites_count'
+    )
+    assert 'X-Cache' not in popular
@@ -0,0 +1,18 @@
+from rest_framework.serializers import BaseSerializer
+
+from api.metrics import registry
+
+
+def test_serializer_time_is_recorded_without_patching(
+    recipes, user_client
+):
+    """
+    Время сериализаторов попадает в метрики, а `BaseSerializer`
+    остаётся без изменений.
+    """
+    data = BaseSerializer.data
+    registry.reset()
+    assert user_client.get('/api/recipes/').status_code == 200
+    endpoint = registry._endpoints[('RecipesViewSet.list', 'GET')]
+    assert endpoint.serializer_seconds > 0
+    assert BaseSerializer.data is data
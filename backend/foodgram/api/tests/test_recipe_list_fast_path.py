@@ -0,0 +1,31 @@
+import pytest
+
+QUERIES = (
+    'limit=6',
+    'limit=3&page=2',
+    'limit=4&cursor=',
+    'limit=50&is_favorited=1',
+    'limit=50&is_in_shopping_cart=1',
+    'limit=50&tags=tag0',
+    'limit=50&tags=tag0&tags=tag2',
+    'limit=50&author={author}',
+    'limit=50&ordering=-favorites_count',
+    'limit=50&search=рецепт',
+)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+@pytest.mark.parametrize('client_name', ('anonymous_client', 'user_client'))
+def test_fast_path_matches_serializer(
+    request, settings, recipes, client_name, query
+):
+    """Быстрый путь `values()` отдаёт те же байты, что и сериализатор."""
+    client = request.getfixturevalue(client_name)
+    url = '/api/recipes/?' + query.format(author=recipes[0].author_id)
+    responses = []
+    for fast_path in (False, True):
+        settings.RECIPE_LIST_FAST_PATH = fast_path
+        responses.append(client.get(url))
+    serializer, fast = responses
+    assert serializer.status_code == fast.status_code == 200
+    assert serializer.content == fast.content
@@ -0,0 +1,26 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.parametrize('fast_path', (False, True))
+@pytest.mark.parametrize('client_name', ('anonymous_client', 'user_client'))
+def test_recipe_list_queries_do_not_depend_on_page_size(
+    request, settings, django_assert_num_queries, recipes, client_name,
+    fast_path
+):
+    """Количество запросов списка рецептов не зависит от `limit`."""
+    settings.RECIPE_LIST_FAST_PATH = fast_path
+    client = request.getfixturevalue(client_name)
+    expected = count_queries(client, '/api/recipes/?limit=1')
+    with django_assert_num_queries(expected):
+        response = client.get('/api/recipes/?limit=50')
+    assert len(response.json()['results']) == len(recipes)
@@ -0,0 +1,39 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Tag
+
+TAG_IDS_QUERY = 'SELECT "recipes_recipetags"."tag_id" FROM'
+
+
+def test_update_reads_current_tags_once(recipes):
+    """
+    При обновлении текущие тэги рецепта читаются один раз, лишние
+    удаляются, недостающие добавляются.
+    """
+    recipe = recipes[0]
+    client = APIClient()
+    client.force_authenticate(recipe.author)
+    kept = recipe.tags.first()
+    added = Tag.objects.exclude(recipes=recipe).first()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            f'/api/recipes/{recipe.id}/',
+            {
+                'tags': [kept.id, added.id],
+                'ingredients': [
+                    {'id': amount.ingredient_id, 'amount': amount.amount}
+                    for amount in recipe.ingredient_amounts.all()
+                ],
+            },
+            format='json',
+        )
+    assert response.status_code == 200
+    assert set(recipe.tags.values_list('id', flat=True)) == {
+        kept.id, added.id
+    }
+    assert sum(
+        query['sql'].startswith(TAG_IDS_QUERY)
+        for query in queries.captured_queries
+    ) == 1
@@ -0,0 +1,19 @@
+import datetime
+import decimal
+
+import pytest
+
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+
+@pytest.mark.parametrize('data', (
+    {'name': 'борщ', 'amount': decimal.Decimal('1.50'), 'tags': [1, 2]},
+    {'date': datetime.datetime(2022, 5, 1, 12, 30), 'text': 'a b'},
+    {'big': 2 ** 70},
+    {1: 'non-string key'},
+    None,
+))
+def test_fast_renderer_matches_json_renderer(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
@@ -0,0 +1,31 @@
+import pytest
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.fixture(autouse=True)
+def pdf_writer(monkeypatch):
+    """PDF без шрифта: проверяется выбор формата, а не содержимое."""
+    monkeypatch.setattr(
+        'api.recipe_views.get_shopping_cart_pdf',
+        lambda queryset, response: response.write(b'%PDF'),
+    )
+
+
+@pytest.mark.parametrize('accept, content_type', (
+    ('application/json', 'application/pdf'),
+    ('text/html', 'application/pdf'),
+    ('text/csv', 'text/csv; charset=utf-8'),
+    ('text/plain', 'text/plain; charset=utf-8'),
+))
+def test_download_format_from_accept(
+    recipes, user_client, accept, content_type
+):
+    """Неподходящий `Accept` даёт PDF, а не 406."""
+    response = user_client.get(URL, HTTP_ACCEPT=accept)
+    assert response.status_code == 200
+    assert response['Content-Type'] == content_type
+
+
+def test_download_unknown_format(recipes, user_client):
+    assert user_client.get(URL, {'format': 'xlsx'}).status_code == 404
@@ -0,0 +1,28 @@
+from recipes.models import RecipeTags, Tag
+
+
+def test_tag_created_by_another_process_is_accepted(
+    anonymous_client, recipes
+):
+    """
+    Слаг тэга, которого ещё нет в карте процесса, ищется в базе,
+    а не отклоняется до истечения `TAG_SLUG_MAP_TTL`.
+    """
+    response = anonymous_client.get('/api/recipes/?tags=tag0')
+    assert response.status_code == 200
+    # `bulk_create` не отправляет сигналы, как и запись из другого процесса.
+    Tag.objects.bulk_create(
+        (Tag(name='новый тэг', color='#000000', slug='new'),)
+    )
+    RecipeTags.objects.create(
+        recipe=recipes[0], tag=Tag.objects.get(slug='new')
+    )
+
+    response = anonymous_client.get('/api/recipes/?tags=new')
+
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.json()['results']] == [
+        recipes[0].id
+    ]
+    response = anonymous_client.get('/api/recipes/?tags=missing')
+    assert response.status_code == 400
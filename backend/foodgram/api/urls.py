@@ -1,16 +1,22 @@
+from django.conf import settings
 from django.urls import include, path, re_path
 from django.views.generic import TemplateView
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework.routers import DefaultRouter
 
-from api import recipe_views, user_views
+from api import async_views, recipe_views, user_views
+from api.metrics import MetricsView
 
 router = DefaultRouter()
 router.register(r'tags', recipe_views.TagsViewSet)
 router.register(r'ingredients', recipe_views.IngredientsViewSet)
 router.register(r'recipes', recipe_views.RecipesViewSet)
 router.register(r'users', user_views.UsersViewSet)
+router.register(
+    r'shopping_cart_exports', recipe_views.ShoppingListExportViewSet,
+    basename='shopping_cart_exports'
+)
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -35,6 +41,23 @@ urlpatterns = [
         'swagger/', schema_view.with_ui('swagger', cache_timeout=0),
         name='schema-swagger-ui'
     ),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('auth/', include('djoser.urls.authtoken')),
     path('', include(router.urls)),
 ]
+
+# Асинхронные представления чтения (`ASYNC_READ_VIEWS`, для запуска
+# под ASGI-сервером) перекрывают маршруты роутера с теми же адресами,
+# остальные маршруты обслуживает роутер.
+async_urlpatterns = [
+    path('recipes/', async_views.recipe_list),
+    re_path(r'^recipes/(?P<pk>[^/.]+)/$', async_views.recipe_detail),
+    path('tags/', async_views.tag_list),
+    re_path(r'^tags/(?P<pk>[^/.]+)/$', async_views.tag_detail),
+    path('ingredients/', async_views.ingredient_list),
+    re_path(r'^ingredients/(?P<pk>[^/.]+)/$', async_views.ingredient_detail),
+    path('users/subscriptions/', async_views.subscriptions),
+]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
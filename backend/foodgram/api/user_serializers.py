@@ -5,6 +5,7 @@ from djoser.serializers import (
 )
 from rest_framework import serializers
 
+from api.utilits import get_recipes_limit
 from recipes.models import Recipe
 from users.models import Follow
 
@@ -62,11 +63,32 @@ class CustomUserSerializer(DjoserUserSerializer):
         current_user = self.context.get('request').user
         if not current_user.is_authenticated:
             return False
-        return current_user.follower.filter(author=obj).exists()
+        return obj.id in self._get_subscriptions(current_user)
+
+    def _get_subscriptions(self, current_user):
+        """
+        Возвращает множество `id` авторов, на которых подписан текущий
+        пользователь. Множество загружается одним запросом и сохраняется
+        в контексте, общем для всех вложенных сериалайзеров запроса.
+        """
+        subscriptions = self.context.get('subscriptions')
+        if subscriptions is None:
+            subscriptions = set(
+                current_user.follower.values_list('author_id', flat=True)
+            )
+            self.context['subscriptions'] = subscriptions
+        return subscriptions
 
 
 class FollowSerializer(serializers.ModelSerializer):
-    """Сериализатор подписок пользователя."""
+    """
+    Сериализатор подписок пользователя.
+    `recipes` - последние рецепты автора, не более `recipes_limit`;
+    если в контексте передан словарь `author_recipes`
+    (`id` автора -> список рецептов), рецепты берутся из него без
+    дополнительных запросов.
+    `recipes_count` - общее количество рецептов автора.
+    """
     email = serializers.ReadOnlyField(source='author.email')
     id = serializers.ReadOnlyField(source='author.id')
     username = serializers.ReadOnlyField(source='author.username')
@@ -78,6 +100,9 @@ class FollowSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField(
         method_name='get_recipes'
     )
+    recipes_count = serializers.SerializerMethodField(
+        method_name='get_recipes_count'
+    )
 
     class Meta:
         model = Follow
@@ -86,6 +111,7 @@ class FollowSerializer(serializers.ModelSerializer):
             'id', 'username',
             'first_name', 'last_name',
             'is_subscribed', 'recipes',
+            'recipes_count',
             'author', 'user'
         )
         read_only_fields = ('id',)
@@ -97,23 +123,27 @@ class FollowSerializer(serializers.ModelSerializer):
         return ret
 
     def get_is_subscribed(self, obj):
-        return obj.user.follower.filter(author=obj.author).exists()
+        """Подписка сериализуется только от имени её владельца."""
+        return True
 
     def get_recipes(self, obj):
-        recipes_limit = self.context['request'].query_params.get(
-            'recipes_limit'
-        )
-        if recipes_limit:
-            return RecipeMinifiedSerializer(
-                instance=obj.author.recipes.all()[:int(recipes_limit)],
-                many=True
-            ).data
-        instance = obj.author.recipes.all()
+        author_recipes = self.context.get('author_recipes')
+        if author_recipes is not None:
+            instance = author_recipes.get(obj.author_id, ())
+        else:
+            recipes_limit = get_recipes_limit(self.context['request'])
+            instance = obj.author.recipes.all()[:recipes_limit]
         return RecipeMinifiedSerializer(
             instance=instance,
             many=True
         ).data
 
+    def get_recipes_count(self, obj):
+        recipes_count = getattr(obj, 'recipes_count', None)
+        if recipes_count is None:
+            return obj.author.recipes.count()
+        return recipes_count
+
     def validate(self, data):
         author = self.initial_data.get('author')
         user = self.context.get('request').user
@@ -151,4 +181,8 @@ class RecipeMinifiedSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = (
+            'id', 'name',
+            'image', 'image_card', 'image_thumbnail', 'image_card_webp',
+            'cooking_time',
+        )
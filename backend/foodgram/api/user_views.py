@@ -1,44 +1,57 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from api.metrics import SerializerMetricsMixin
 from api.user_serializers import (
     CustomUserSerializer, FollowSerializer, UnfollowSerializer,
 )
-from api.utilits import LimitPagePagination
+from api.utilits import LimitPageOrKeysetPagination, get_recipes_limit
+from recipes.models import Recipe
 from users.models import Follow
 
 User = get_user_model()
 
 
-class UsersViewSet(DjoserUserViewSet):
+class UsersViewSet(SerializerMetricsMixin, DjoserUserViewSet):
     """Представление данных пользователей."""
     serializer_class = CustomUserSerializer
-    pagination_class = LimitPagePagination
+    pagination_class = LimitPageOrKeysetPagination
 
     @action(
         detail=False,
         permission_classes=(permissions.IsAuthenticated,),
-        pagination_class=LimitPagePagination
+        pagination_class=LimitPageOrKeysetPagination
     )
     def subscriptions(self, request):
         """
         Возвращает пользователей, на которых подписан текущий пользователь.
         В выдачу добавляются рецепты.
         """
-        queryset = Follow.objects.filter(user=request.user)
+        queryset = Follow.objects.filter(user=request.user).select_related(
+            'author'
+        ).annotate(recipes_count=Count('author__recipes')).order_by('-id')
         pages = self.paginate_queryset(queryset)
+        follows = queryset if pages is None else pages
+        author_recipes = defaultdict(list)
+        for recipe in Recipe.objects.top_for_authors(
+            [follow.author_id for follow in follows],
+            get_recipes_limit(request)
+        ):
+            author_recipes[recipe.author_id].append(recipe)
+        serializer = self.measure_serializer(FollowSerializer(
+            instance=follows,
+            many=True,
+            context={'request': request, 'author_recipes': author_recipes}
+        ))
         if pages is None:
-            serializer = FollowSerializer(
-                instance=queryset, many=True, context={'request': request}
-            )
             return Response(serializer.data)
-        serializer = FollowSerializer(
-            instance=pages, many=True, context={'request': request}
-        )
         return self.get_paginated_response(serializer.data)
 
     @action(
@@ -49,12 +62,12 @@ class UsersViewSet(DjoserUserViewSet):
     def subscribe(self, request, id):
         """Подписаться на пользователя."""
         author = get_object_or_404(User, id=id)
-        serializer = FollowSerializer(
+        serializer = self.measure_serializer(FollowSerializer(
             data={'author': author.id, 'user': request.user.id},
             context={
                 'request': request,
             }
-        )
+        ))
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
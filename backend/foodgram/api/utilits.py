@@ -1,16 +1,18 @@
-import os
+import json
+import math
 
-import reportlab.rl_config
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 
 from django.conf import settings
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-from rest_framework.pagination import PageNumberPagination
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-reportlab.rl_config.TTFSearchPath.append(
-    str(os.path.join(settings.STATIC_ROOT, 'ttfonts'))
-)
+MIN_INT = -2 ** 63
+MAX_INT = 2 ** 63 - 1
 
 
 class LimitPagePagination(PageNumberPagination):
@@ -21,28 +23,166 @@ class LimitPagePagination(PageNumberPagination):
     page_size_query_param = 'limit'
 
 
-def get_shopping_cart_pdf(shopping_cart_queryset, writable_object):
+class KeysetPagination(BasePagination):
+    """Курсорный паджинатор по ключу сортировки queryset.
+    Ключ - поля сортировки queryset (или `Meta.ordering` модели),
+    дополненные `id`. Следующая страница выбирается условием
+    `(pub_date, id) < (последние значения)` без `COUNT(*)` и `OFFSET`,
+    поэтому стоимость страницы не зависит от глубины прокрутки.
+    `limit` - задаёт количество объектов на странице;
+    `cursor` - курсор, пустое значение - первая страница.
     """
-    Создаёт PDF файл с данными перданного queryset.
-    Каждый объект queryset имеет ключи: `name`, `amount`, `unit`.
-    """
-    pdfmetrics.registerFont(
-        TTFont('Arial', 'arial.ttf', 'UTF-8')
-    )
-    page = canvas.Canvas(writable_object)
-    page.setFont('Arial', size=24)
-    page.drawString(200, 800, 'Список ингредиентов')
-    page.setFont('Arial', size=16)
-    height = 750
-    for i, item in enumerate(shopping_cart_queryset, 1):
-        page.drawString(
-            75,
-            height,
-            (
-                f"{i}.  {item['name']} - {item['amount']} {item['unit']}"
-            ),
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def get_ordering(self, queryset):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
         )
-        height -= 25
-    page.showPage()
-    page.save()
-    return writable_object
+        if not {'id', '-id', 'pk', '-pk'}.intersection(ordering):
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size is not None and page_size.isdigit() and int(page_size):
+            return min(int(page_size), self.max_page_size)
+        return self.page_size
+
+    def get_ordering_field(self, queryset, name):
+        """Поле модели или аннотации queryset, по которому идёт сортировка."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, cursor, queryset):
+        """
+        Разбирает курсор и приводит значения позиции к типам полей
+        сортировки; курсор, собранный вручную с неверными значениями,
+        даёт 404, а не ошибку в запросе к базе.
+        """
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                self.get_ordering_field(
+                    queryset, field.lstrip('-')
+                ).clean(value, None)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (
+            FieldDoesNotExist, ValidationError, ValueError, TypeError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        if not all(map(self.is_valid_value, position)):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    @staticmethod
+    def is_valid_value(value):
+        """Значение позиции, которое база сможет сравнить с полем."""
+        if isinstance(value, float):
+            return math.isfinite(value)
+        if isinstance(value, int):
+            return MIN_INT <= value <= MAX_INT
+        return value is not None
+
+    def encode_cursor(self, instance):
+        if isinstance(instance, dict):
+            position = [instance[field.lstrip('-')] for field in self.ordering]
+        else:
+            position = [
+                getattr(instance, field.lstrip('-'))
+                for field in self.ordering
+            ]
+        return urlsafe_b64encode(
+            json.dumps(position, default=str).encode()
+        ).decode()
+
+    def get_position_filter(self, position):
+        """Условие «строка идёт после `position`» для ключа сортировки."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            field = field.lstrip('-')
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            position = self.decode_cursor(cursor, queryset)
+            queryset = queryset.filter(self.get_position_filter(position))
+        page_size = self.get_page_size(request)
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
+
+
+class LimitPageOrKeysetPagination(LimitPagePagination):
+    """Страничный паджинатор, переключаемый на курсорный.
+    При наличии в запросе параметра `cursor` используется
+    `KeysetPagination`, иначе - `LimitPagePagination`.
+    """
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_paginator = None
+        if self.keyset_pagination_class.cursor_query_param in (
+            request.query_params
+        ):
+            self.keyset_paginator = self.keyset_pagination_class()
+            return self.keyset_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+def get_recipes_limit(request):
+    """
+    Возвращает количество рецептов автора для выдачи подписок из параметра
+    `recipes_limit`; по умолчанию `SUBSCRIPTIONS_RECIPES_LIMIT`.
+    """
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is not None and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return settings.SUBSCRIPTIONS_RECIPES_LIMIT
@@ -0,0 +1,112 @@
+from io import BytesIO
+
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorites, Ingredient, IngredientAmount, Recipe, RecipeTags, ShoppingCart,
+    Tag,
+)
+from users.models import Follow
+
+User = get_user_model()
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def make_image(name='recipe.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings, tmp_path):
+    """Медиафайлы во временном каталоге, кеш ответов отключён."""
+    settings.MEDIA_ROOT = tmp_path
+    settings.CACHES = DUMMY_CACHES
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username='reader', email='reader@foodgram.ru', password='pass'
+    )
+
+
+@pytest.fixture
+def recipes(user):
+    """
+    Рецепты трёх авторов с тэгами и ингредиентами; `user` подписан
+    на первого автора, часть рецептов у него в избранном и в списке покупок.
+    """
+    authors = [
+        User.objects.create_user(
+            username=f'author{number}',
+            email=f'author{number}@foodgram.ru',
+            password='pass',
+        )
+        for number in range(3)
+    ]
+    tags = [
+        Tag.objects.create(
+            name=f'тэг {number}', color='#ffffff', slug=f'tag{number}'
+        )
+        for number in range(3)
+    ]
+    ingredients = [
+        Ingredient.objects.create(
+            name=f'ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(10)
+    ]
+    recipes = []
+    for number in range(12):
+        recipe = Recipe.objects.create(
+            author=authors[number % len(authors)],
+            name=f'рецепт {number}',
+            text='описание',
+            cooking_time=number + 1,
+            image=make_image(),
+        )
+        RecipeTags.objects.bulk_create(
+            RecipeTags(recipe=recipe, tag=tags[(number + shift) % 3])
+            for shift in range(2)
+        )
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                recipe=recipe,
+                ingredient=ingredients[(number + shift) % 10],
+                amount=shift + 1,
+            )
+            for shift in range(3)
+        )
+        recipes.append(recipe)
+    Follow.objects.create(user=user, author=authors[0])
+    for recipe in recipes[::3]:
+        Favorites.objects.create(user=user, recipe=recipe)
+    for recipe in recipes[::4]:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    return recipes
+
+
+@pytest.fixture
+def new_image():
+    return make_image('new.png')
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
@@ -2,6 +2,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from recipes.ingredient_index import ingredient_index
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_asgi_application()
+ingredient_index.warm()
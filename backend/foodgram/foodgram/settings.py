@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,10 +74,44 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'password'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', '5432')
+        'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ).lower() in ('true', '1'),
+        # Пулер в режиме транзакций (PgBouncer) не поддерживает
+        # серверные курсоры `QuerySet.iterator()`.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_TRANSACTION_POOLING', 'False'
+        ).lower() in ('true', '1'),
     }
 }
 
+# Постоянное соединение проверяется в начале запроса, только если
+# не использовалось дольше этого числа секунд.
+CONN_HEALTH_CHECK_IDLE = int(os.getenv('DB_CONN_HEALTH_CHECK_IDLE', 30))
+
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+REFERENCE_MAX_AGE = int(os.getenv('REFERENCE_MAX_AGE', 60))
+
+
+# Metrics
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() in (
+    'true', '1',
+)
+
 
 # Password validation
 
@@ -135,6 +171,15 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'SEARCH_PARAM': 'name',
 }
 
@@ -157,3 +202,13 @@ DJOSER = {
 
 MINIMUM_COOKING_TIME = 1
 LEAST_AMOUNT_OF_INGREDIENT = 1
+SUBSCRIPTIONS_RECIPES_LIMIT = 3
+TAG_SLUG_MAP_TTL = 300
+RECIPE_LIST_FAST_PATH = os.getenv(
+    'RECIPE_LIST_FAST_PATH', 'False'
+).lower() in ('true', '1')
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+ASYNC_READ_VIEWS = os.getenv(
+    'ASYNC_READ_VIEWS', 'False'
+).lower() in ('true', '1')
+EXPORT_TIMEOUT = int(os.getenv('EXPORT_TIMEOUT', 600))
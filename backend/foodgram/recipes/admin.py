@@ -2,7 +2,7 @@ from django.contrib import admin
 
 from recipes.models import (
     Favorites, Ingredient, IngredientAmount, Recipe, RecipeTags, ShoppingCart,
-    Tag,
+    ShoppingListExport, Tag,
 )
 
 
@@ -46,9 +46,11 @@ class RecipesAdmin(admin.ModelAdmin):
     filter_horizontal = ('ingredients',)
     inlines = (RecipeTagsInline, IngredientAmountInline)
 
-    @admin.display(description='популярность')
+    @admin.display(
+        description='популярность', ordering='favorites_count'
+    )
     def favorite_count(self, obj):
-        return Favorites.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
 
 @admin.register(Favorites)
@@ -68,3 +70,15 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     search_fields = (
         'user__username', 'user__email',
     )
+
+
+@admin.register(ShoppingListExport)
+class ShoppingListExportAdmin(admin.ModelAdmin):
+    """Выгрузки списков покупок."""
+    list_display = (
+        'user', 'format', 'status', 'created', 'started', 'finished',
+    )
+    list_filter = ('status', 'format')
+    search_fields = (
+        'user__username', 'user__email',
+    )
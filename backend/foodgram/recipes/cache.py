@@ -0,0 +1,39 @@
+from django.db.models import F
+from django.utils import timezone
+
+from recipes.models import DataVersion
+
+RECIPES = 'recipes'
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+
+
+def get_version(name):
+    """
+    Возвращает версию данных `name` (`DataVersion`) одним запросом:
+    поколение и время последнего изменения.
+    """
+    version, _ = DataVersion.objects.get_or_create(name=name)
+    return version
+
+
+def get_generation(name):
+    """Возвращает текущее поколение данных `name`."""
+    return get_version(name).generation
+
+
+def bump_generation(*names):
+    """
+    Увеличивает поколение данных, делая устаревшими связанные кеши
+    и `ETag` во всех процессах. Версия меняется в той же транзакции, что
+    и данные, поэтому новое поколение становится видно вместе с ними.
+    """
+    modified = timezone.now()
+    for name in names:
+        updated = DataVersion.objects.filter(name=name).update(
+            generation=F('generation') + 1, modified=modified
+        )
+        if not updated:
+            DataVersion.objects.get_or_create(
+                name=name, defaults={'modified': modified}
+            )
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+
+
+def close_unusable_connections(idle=None):
+    """
+    Проверка постоянных соединений с базой (`CONN_HEALTH_CHECKS`
+    из Django 4.1): открытое соединение, которое больше не отвечает,
+    например после перезапуска контейнера базы, закрывается, и следующий
+    запрос открывает новое вместо ошибки `OperationalError`.
+    Проверяются только соединения, не использовавшиеся дольше `idle`
+    секунд (по умолчанию `CONN_HEALTH_CHECK_IDLE`): соединение, через
+    которое только что прошёл запрос, не проверяется повторно.
+    Соединения внутри транзакции не проверяются.
+    """
+    if idle is None:
+        idle = settings.CONN_HEALTH_CHECK_IDLE
+    now = time.monotonic()
+    for db_connection in connections.all():
+        if (
+            db_connection.connection is None
+            or not db_connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            or db_connection.in_atomic_block
+        ):
+            continue
+        last_used = getattr(db_connection, 'health_check_used', None)
+        db_connection.health_check_used = now
+        if (
+            (last_used is None or now - last_used >= idle)
+            and not db_connection.is_usable()
+        ):
+            db_connection.close()
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """
+    Проверяет постоянные соединения с базой в начале запроса,
+    после закрытия устаревших `close_old_connections`.
+    """
+    close_unusable_connections()
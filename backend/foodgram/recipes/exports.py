@@ -0,0 +1,87 @@
+import secrets
+import tempfile
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils.timezone import now
+
+from recipes.models import ShoppingListExport
+from recipes.shopping_list import get_shopping_list
+from recipes.shopping_list_files import (
+    get_shopping_cart_pdf, iter_shopping_cart_csv, iter_shopping_cart_txt,
+)
+
+TEXT_WRITERS = {
+    ShoppingListExport.TXT: iter_shopping_cart_txt,
+    ShoppingListExport.CSV: iter_shopping_cart_csv,
+}
+
+
+def claim_export():
+    """
+    Забирает из очереди самое старое задание и переводит его в статус
+    `running`. Задание захватывается условным `UPDATE`, поэтому
+    несколько обработчиков не возьмут одно задание дважды.
+    Задание в статусе `running` дольше `EXPORT_TIMEOUT` секунд считается
+    брошенным упавшим обработчиком и забирается заново.
+    Возвращает задание или `None`, если очередь пуста.
+    """
+    started = now()
+    claimable = ShoppingListExport.objects.filter(
+        Q(status=ShoppingListExport.PENDING)
+        | Q(
+            status=ShoppingListExport.RUNNING,
+            started__lt=started - timedelta(seconds=settings.EXPORT_TIMEOUT),
+        )
+    )
+    while True:
+        export_id = claimable.order_by('id').values_list(
+            'id', flat=True
+        ).first()
+        if export_id is None:
+            return None
+        if claimable.filter(id=export_id).update(
+            status=ShoppingListExport.RUNNING, started=started
+        ):
+            return ShoppingListExport.objects.select_related(
+                'user'
+            ).get(id=export_id)
+
+
+def render_export(export, writable_object):
+    """Записывает список покупок пользователя задания в файл."""
+    shopping_list = get_shopping_list(export.user).iterator()
+    if export.format == ShoppingListExport.PDF:
+        get_shopping_cart_pdf(shopping_list, writable_object)
+        return
+    for chunk in TEXT_WRITERS[export.format](shopping_list):
+        writable_object.write(chunk.encode())
+
+
+def run_export(export):
+    """
+    Создаёт файл задания в медиа-хранилище и отмечает результат.
+    Файлы лежат в публичном медиа, поэтому имя файла - случайный токен,
+    а не `id` задания, который можно подобрать.
+    Ошибка сохраняется в задании, чтобы клиент увидел её при опросе.
+    """
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            render_export(export, tmp)
+            tmp.seek(0)
+            export.file.save(
+                f'shopping_cart_{secrets.token_urlsafe(16)}.{export.format}',
+                File(tmp),
+                save=False,
+            )
+    except Exception as error:
+        export.status = ShoppingListExport.FAILED
+        export.error = str(error)
+    else:
+        export.status = ShoppingListExport.DONE
+    export.finished = now()
+    export.save(update_fields=('file', 'status', 'error', 'finished'))
+    return export
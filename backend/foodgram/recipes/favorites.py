@@ -0,0 +1,59 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorites, Recipe
+
+
+def change_favorites_count(recipe_id, delta):
+    """
+    Атомарно изменяет счётчик `favorites_count` рецепта на `delta`
+    выражением `F()`, без чтения текущего значения.
+    """
+    recipes = Recipe.objects.filter(pk=recipe_id)
+    if delta < 0:
+        recipes = recipes.filter(favorites_count__gte=-delta)
+    recipes.update(favorites_count=F('favorites_count') + delta)
+
+
+def refresh_favorites_count(recipes):
+    """
+    Подставляет текущие `favorites_count` в словари рецептов `recipes`
+    (например, из закешированного ответа) одним запросом.
+    """
+    counts = dict(
+        Recipe.objects.filter(
+            pk__in=[recipe['id'] for recipe in recipes]
+        ).values_list('pk', 'favorites_count')
+    )
+    for recipe in recipes:
+        if recipe['id'] in counts:
+            recipe['favorites_count'] = counts[recipe['id']]
+
+
+def reconcile_favorites_count(recipe_ids=None):
+    """
+    Приводит `favorites_count` в соответствие с таблицей `Favorites`
+    для переданных рецептов или для всех, если `recipe_ids` не указан.
+    Возвращает количество исправленных рецептов.
+    """
+    actual = Coalesce(
+        Subquery(
+            Favorites.objects.filter(
+                recipe=OuterRef('pk')
+            ).order_by().values('recipe').annotate(
+                total=Count('id')
+            ).values('total')
+        ),
+        Value(0),
+    )
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    drifted = list(
+        recipes.annotate(actual=actual).exclude(
+            favorites_count=F('actual')
+        ).values_list('pk', flat=True)
+    )
+    return Recipe.objects.filter(pk__in=drifted).update(
+        favorites_count=actual
+    )
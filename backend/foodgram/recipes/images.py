@@ -0,0 +1,64 @@
+import os
+
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+# Поле модели, размер (ширина, высота), формат и расширение файла.
+DERIVATIVES = (
+    ('image_card', (600, 400), 'JPEG', 'jpg'),
+    ('image_thumbnail', (240, 160), 'JPEG', 'jpg'),
+    ('image_card_webp', (600, 400), 'WEBP', 'webp'),
+)
+DERIVATIVE_FIELDS = tuple(field for field, *_ in DERIVATIVES)
+IMAGE_FIELDS = ('image', *DERIVATIVE_FIELDS)
+QUALITY = 85
+
+
+def make_image_derivatives(recipe):
+    """
+    Создаёт уменьшенные копии изображения рецепта фиксированных размеров
+    и записывает их в поля `DERIVATIVE_FIELDS` без сохранения рецепта.
+    """
+    recipe.image.open()
+    with Image.open(recipe.image) as source:
+        source = ImageOps.exif_transpose(source).convert('RGB')
+        name = os.path.splitext(os.path.basename(recipe.image.name))[0]
+        for field, size, image_format, extension in DERIVATIVES:
+            derivative = ImageOps.fit(source, size, Image.LANCZOS)
+            buffer = BytesIO()
+            derivative.save(buffer, image_format, quality=QUALITY)
+            getattr(recipe, field).save(
+                f'{name}.{extension}',
+                ContentFile(buffer.getvalue()),
+                save=False
+            )
+
+
+def get_image_names(recipe):
+    """Имена файлов изображения рецепта и его копий по полям."""
+    return {field: getattr(recipe, field).name for field in IMAGE_FIELDS}
+
+
+def delete_replaced_images(recipe, old_names):
+    """
+    После фиксации транзакции удаляет файлы `old_names`, заменённые
+    в сохранённом рецепте. Файл, на который ссылается другой рецепт
+    (например, общее изображение `generate_dataset`), не удаляется.
+    """
+    replaced = [
+        (field, name) for field, name in old_names.items()
+        if name and name != getattr(recipe, field).name
+    ]
+    if not replaced:
+        return
+    recipes = type(recipe)._default_manager
+
+    def delete():
+        for field, name in replaced:
+            if not recipes.filter(**{field: name}).exists():
+                getattr(recipe, field).storage.delete(name)
+
+    transaction.on_commit(delete)
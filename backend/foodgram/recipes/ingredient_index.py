@@ -0,0 +1,106 @@
+import threading
+
+from bisect import bisect_left
+
+from django.db import DatabaseError, connections
+
+
+def _trigrams(value):
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для поиска по началу и вхождению
+    строки в название без учёта регистра.
+    Индекс строится при запуске процесса сервера (`warm`) и
+    перестраивается, когда меняется поколение ингредиентов в базе
+    (`recipes.cache.INGREDIENTS`), в том числе изменёнными другими
+    процессами и командами: каждый поиск сверяет поколение одним запросом.
+    Изменения прямым SQL без смены поколения в индекс не попадают.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    def invalidate(self):
+        self._state = None
+
+    def _build(self, generation):
+        from recipes.models import Ingredient
+
+        entries = sorted(
+            (
+                {'id': id, 'name': name, 'measurement_unit': unit}
+                for id, name, unit in Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                )
+            ),
+            key=lambda entry: (entry['name'].casefold(), entry['id'])
+        )
+        keys = [entry['name'].casefold() for entry in entries]
+        trigrams = {}
+        for position, key in enumerate(keys):
+            for trigram in _trigrams(key):
+                trigrams.setdefault(trigram, []).append(position)
+        return generation, entries, keys, trigrams
+
+    def _get_state(self):
+        from recipes.cache import INGREDIENTS, get_generation
+
+        generation = get_generation(INGREDIENTS)
+        state = self._state
+        if state is None or state[0] != generation:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != generation:
+                    state = self._state = self._build(generation)
+        return state
+
+    def warm(self):
+        """
+        Строит индекс при запуске процесса, чтобы его не строил первый
+        запрос. Если база ещё недоступна или не создана, индекс построит
+        первый поиск. Соединение закрывается: процесс может быть
+        родительским для процессов сервера.
+        """
+        try:
+            self._get_state()
+        except DatabaseError:
+            pass
+        finally:
+            connections.close_all()
+
+    def search(self, query):
+        """
+        Возвращает ингредиенты, название которых начинается с `query`,
+        а за ними - содержащие `query`; обе группы упорядочены по названию.
+        """
+        _, entries, keys, trigrams = self._get_state()
+        query = query.strip().casefold()
+        if not query:
+            return list(entries)
+        start = position = bisect_left(keys, query)
+        while position < len(keys) and keys[position].startswith(query):
+            position += 1
+        prefix_matches = range(start, position)
+        if len(query) < 3:
+            candidates = range(len(keys))
+        else:
+            postings = sorted(
+                (trigrams.get(trigram, ()) for trigram in _trigrams(query)),
+                key=len
+            )
+            candidates = set(postings[0]).intersection(*postings[1:])
+        substring_matches = sorted(
+            position for position in candidates
+            if position not in prefix_matches and query in keys[position]
+        )
+        return [
+            entries[position]
+            for position in (*prefix_matches, *substring_matches)
+        ]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,244 @@
+import asyncio
+import importlib
+import statistics
+import time
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def load_urls():
+    """Перечитывает маршруты после изменения `ASYNC_READ_VIEWS`."""
+    importlib.reload(importlib.import_module('api.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+class QueryDelay:
+    """
+    Обёртка `execute_wrappers`, добавляющая к каждому SQL-запросу
+    задержку - сетевую задержку до сервера базы данных.
+    """
+
+    def __init__(self):
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.seconds:
+            time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+query_delay = QueryDelay()
+
+
+async def send_request(application, path, token):
+    """Выполняет `GET` в ASGI-приложении, возвращает код ответа."""
+    url = urlsplit(path)
+    headers = [(b'host', b'testserver')]
+    if token is not None:
+        headers.append((b'authorization', f'Token {token}'.encode()))
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': headers,
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    status = None
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = """
+    Замер пропускной способности представлений чтения под ASGI
+    в двух режимах: синхронные viewset (по умолчанию) и асинхронные
+    представления `ASYNC_READ_VIEWS`. Запросы к списку и деталям рецептов,
+    тэгам, ингредиентам и подпискам выполняются в ASGI-приложении
+    в процессе команды заданным числом одновременных соединений, без сети.
+    Для каждого режима печатается количество запросов в секунду
+    и задержка ответа. Кеш ответов на время замера отключается.
+    Локальная база отвечает без сетевой задержки, поэтому для оценки
+    работы с сервером базы данных её можно добавить к каждому запросу.
+    Формат команды: `python manage.py benchmark_concurrency *keys`
+    `'-c', '--concurrency'` количество одновременных соединений;
+    `'-n', '--requests'` количество запросов в каждом режиме;
+    `'-t', '--threads'` размер пула потоков для запросов к базе;
+    `'-u', '--user'` `id` пользователя для запросов с авторизацией,
+    по умолчанию - автор первого рецепта;
+    `'-d', '--db-latency'` задержка каждого SQL-запроса в миллисекундах;
+    `'--cache'` не отключать кеш ответов.
+    Пример: `python manage.py benchmark_concurrency -c 200 -n 5000 -d 1`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-c', '--concurrency',
+            type=int,
+            default=200,
+            help='takes the number of concurrent connections')
+        parser.add_argument(
+            '-n', '--requests',
+            type=int,
+            default=2000,
+            help='takes the number of requests for every mode')
+        parser.add_argument(
+            '-t', '--threads',
+            type=int,
+            default=16,
+            help='takes the size of the database thread pool')
+        parser.add_argument(
+            '-u', '--user',
+            type=int,
+            help='takes the id of the user')
+        parser.add_argument(
+            '-d', '--db-latency',
+            type=float,
+            default=0,
+            help='takes the delay added to every SQL query in milliseconds')
+        parser.add_argument(
+            '--cache',
+            action='store_true',
+            help='keeps the response cache enabled')
+
+    def get_requests(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        recipe = Recipe.objects.first()
+        tag = Tag.objects.first()
+        ingredient = Ingredient.objects.first()
+        requests = [
+            ('/api/recipes/', None),
+            (f'/api/recipes/{recipe.id}/', None),
+            ('/api/recipes/?limit=6', token.key),
+            (f'/api/recipes/{recipe.id}/', token.key),
+            ('/api/users/subscriptions/', token.key),
+        ]
+        if tag is not None:
+            requests += [('/api/tags/', None), (f'/api/tags/{tag.id}/', None)]
+        if ingredient is not None:
+            requests += [
+                (f'/api/ingredients/?name={ingredient.name[:2]}', None),
+                (f'/api/ingredients/{ingredient.id}/', None),
+            ]
+        return requests
+
+    async def run_load(self, application, requests, options):
+        """Возвращает длительность замера, задержки и ошибки."""
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=options['threads'])
+        )
+        for path, token in requests:
+            await send_request(application, path, token)
+        numbers = count()
+        latencies = []
+        errors = Counter()
+
+        async def connection():
+            while (number := next(numbers)) < options['requests']:
+                path, token = requests[number % len(requests)]
+                started = time.perf_counter()
+                status = await send_request(application, path, token)
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors[f'{path} {status}'] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(connection() for _ in range(options['concurrency']))
+        )
+        return time.perf_counter() - started, latencies, errors
+
+    def run_mode(self, async_views, requests, options):
+        with override_settings(ASYNC_READ_VIEWS=async_views):
+            load_urls()
+            duration, latencies, errors = asyncio.run(
+                self.run_load(ASGIHandler(), requests, options)
+            )
+        load_urls()
+        latencies.sort()
+        self.stdout.write(
+            f'{"async" if async_views else "sync":<6} '
+            f'{len(latencies) / duration:8.1f} req/s, '
+            f'p50 {statistics.median(latencies) * 1000:8.1f} ms, '
+            f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:8.1f} ms'
+        )
+        return errors
+
+    def handle(self, *args, **options):
+        if min(options['concurrency'], options['requests']) < 1:
+            raise CommandError(
+                'Количество соединений и запросов должно быть больше 0'
+            )
+        recipe = Recipe.objects.select_related('author').first()
+        if recipe is None:
+            raise CommandError('Рецептов нет, запустите generate_dataset')
+        user = recipe.author
+        if options['user'] is not None:
+            user = User.objects.filter(id=options['user']).first()
+            if user is None:
+                raise CommandError('Пользователь не найден')
+        requests = self.get_requests(user)
+        connection_created.connect(query_delay.install)
+        for db_connection in connections.all():
+            query_delay.install(connection=db_connection)
+        query_delay.seconds = options['db_latency'] / 1000
+        caches = settings.CACHES if options['cache'] else DUMMY_CACHES
+        errors = Counter()
+        with override_settings(
+            CACHES=caches,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            try:
+                for async_views in (False, True):
+                    errors += self.run_mode(async_views, requests, options)
+            finally:
+                query_delay.seconds = 0
+                connection_created.disconnect(query_delay.install)
+        if errors:
+            raise CommandError(
+                'Ошибки: ' + '; '.join(
+                    f'{request} x{number}'
+                    for request, number in errors.items()
+                )
+            )
+        self.stdout.write(self.style.SUCCESS('All requests succeeded'))
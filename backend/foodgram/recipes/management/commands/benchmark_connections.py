@@ -0,0 +1,157 @@
+import statistics
+import sys
+import time
+
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+# Название, `CONN_MAX_AGE`, `CONN_HEALTH_CHECKS`, `CONN_HEALTH_CHECK_IDLE`;
+# `None` - значение из параметров команды или настроек.
+MODES = (
+    ('no reuse', 0, False, None),
+    ('reuse', None, False, None),
+    ('reuse + check always', None, True, 0),
+    ('reuse + check if idle', None, True, None),
+)
+
+
+class Command(BaseCommand):
+    help = """
+    Замер задержки запроса с открытием соединения с базой на каждый
+    запрос (`CONN_MAX_AGE = 0`) и с постоянными соединениями без проверки
+    и с проверкой `CONN_HEALTH_CHECKS` перед каждым запросом и только после
+    простоя `CONN_HEALTH_CHECK_IDLE`. Запросы выполняются через
+    WSGI-обработчик в процессе команды со всеми сигналами начала и конца
+    запроса, поэтому соединения открываются и закрываются так же,
+    как под gunicorn. Для каждого режима печатается медианная задержка,
+    95-й перцентиль и количество открытых соединений.
+    Кеш ответов на время замера отключается.
+    Формат команды: `python manage.py benchmark_connections *keys`
+    `'-n', '--requests'` количество запросов в каждом режиме;
+    `'-p', '--path'` адрес запроса;
+    `'-m', '--max-age'` `CONN_MAX_AGE` режимов с постоянными соединениями.
+    Пример: `python manage.py benchmark_connections -n 500 -p /api/tags/`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n', '--requests',
+            type=int,
+            default=200,
+            help='takes the number of requests for every mode')
+        parser.add_argument(
+            '-p', '--path',
+            default='/api/recipes/?limit=6',
+            help='takes the request path')
+        parser.add_argument(
+            '-m', '--max-age',
+            type=int,
+            default=600,
+            help='takes CONN_MAX_AGE for persistent connections')
+
+    def get_environ(self, path):
+        url = urlsplit(path)
+        return {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'testserver',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+
+    def send_request(self, handler, path):
+        """Выполняет запрос, возвращает код ответа."""
+        statuses = []
+        response = handler(
+            self.get_environ(path),
+            lambda status, headers: statuses.append(status),
+        )
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        return int(statuses[0].split()[0])
+
+    def run_mode(self, handler, path, requests, max_age, health_checks,
+                 idle):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+        created = []
+
+        def count_connection(sender, **kwargs):
+            created.append(sender)
+
+        connection_created.connect(count_connection)
+        latencies = []
+        try:
+            with override_settings(CONN_HEALTH_CHECK_IDLE=idle):
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    status = self.send_request(handler, path)
+                    latencies.append(time.perf_counter() - started)
+                    if status != 200:
+                        raise CommandError(f'{path}: ответ {status}')
+        finally:
+            connection_created.disconnect(count_connection)
+        latencies.sort()
+        return (
+            statistics.median(latencies) * 1000,
+            latencies[int(len(latencies) * 0.95)] * 1000,
+            len(created),
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Количество запросов должно быть больше 0')
+        if options['max_age'] == 0:
+            raise CommandError('CONN_MAX_AGE должен быть отличен от 0')
+        saved = {
+            key: connection.settings_dict.get(key)
+            for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')
+        }
+        handler = WSGIHandler()
+        with override_settings(
+            CACHES=DUMMY_CACHES,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            self.send_request(handler, options['path'])
+            try:
+                for title, max_age, health_checks, idle in MODES:
+                    median, p95, created = self.run_mode(
+                        handler,
+                        options['path'],
+                        options['requests'],
+                        options['max_age'] if max_age is None else max_age,
+                        health_checks,
+                        settings.CONN_HEALTH_CHECK_IDLE if idle is None
+                        else idle,
+                    )
+                    self.stdout.write(
+                        f'{title:<22} p50 {median:7.3f} ms, '
+                        f'p95 {p95:7.3f} ms, connections opened {created}'
+                    )
+            finally:
+                connection.close()
+                connection.settings_dict.update(saved)
+        self.stdout.write(self.style.SUCCESS('Successfully benchmarked'))
@@ -0,0 +1,418 @@
+import json
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from api import urls as api_urls
+from recipes.management.commands.generate_dataset import (
+    PASSWORD, USERNAME_PREFIX,
+)
+from recipes.models import Favorites, Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Follow
+
+User = get_user_model()
+
+# Маршруты djoser, которые отправляют письма или меняют учётные данные,
+# не замеряются.
+SKIPPED_ROUTES = {
+    'user-activation', 'user-resend-activation', 'user-reset-password',
+    'user-reset-password-confirm', 'user-reset-username',
+    'user-reset-username-confirm', 'user-set-username',
+}
+
+# Бюджеты количества SQL-запросов на один запрос к API, включая
+# SAVEPOINT вложенных транзакций.
+QUERY_BUDGETS = {
+    'api root': 0,
+    'redoc': 0,
+    'swagger ui': 0,
+    'swagger schema': 0,
+    'metrics': 0,
+    'token login': 6,
+    'token logout': 1,
+    'tags list': 1,
+    'tag detail': 1,
+    'ingredients list': 1,
+    'ingredients search': 1,
+    'ingredient detail': 1,
+    'recipes list, anonymous': 4,
+    'recipes list': 5,
+    'recipes list, cursor': 4,
+    'recipes list, tags filter': 6,
+    'recipes list, is_favorited': 5,
+    'recipes list, popular': 5,
+    'recipes list, search': 5,
+    'recipe detail': 4,
+    'recipe create': 12,
+    'recipe update': 14,
+    'recipe delete': 24,
+    'favorite add': 6,
+    'favorite remove': 4,
+    'shopping cart add': 13,
+    'shopping cart remove': 10,
+    'download shopping cart, pdf': 1,
+    'download shopping cart, txt': 1,
+    'download shopping cart, csv': 1,
+    'shopping cart export create': 1,
+    'shopping cart export detail': 1,
+    'users list': 3,
+    'user me': 1,
+    'user detail': 2,
+    'user create': 5,
+    'user delete': 13,
+    'set password': 1,
+    'subscriptions': 3,
+    'subscribe': 7,
+    'unsubscribe': 6,
+}
+
+
+def iter_route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+class Case:
+    """Запрос к API: путь и тело могут зависеть от предыдущих ответов."""
+
+    def __init__(self, name, route, method, path, data=None, auth='user',
+                 status=200):
+        self.name = name
+        self.route = route
+        self.method = method
+        self.path = path
+        self.data = data
+        self.auth = auth
+        self.status = status
+
+    def resolve(self, value, state):
+        return value(state) if callable(value) else value
+
+
+class Command(BaseCommand):
+    help = """
+    Замер времени ответа и количества SQL-запросов всех маршрутов API
+    на данных `generate_dataset`. Превышение бюджета SQL-запросов или
+    неожиданный статус ответа завершают команду с ошибкой.
+    Все изменения данных откатываются после замера.
+    Формат команды: `python manage.py benchmark_endpoints *keys`
+    `'-r', '--repeat'` количество повторов каждого запроса;
+    `'-u', '--user'` `id` пользователя, от имени которого выполняются
+    запросы; по умолчанию - сгенерированный пользователь с наибольшим
+    количеством подписок;
+    `'-o', '--output'` файл для результатов в JSON, по умолчанию -
+    стандартный вывод.
+    Пример: `python manage.py benchmark_endpoints -r 20 -o bench.json`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--repeat',
+            type=int,
+            default=10,
+            help='takes the number of runs for every request')
+        parser.add_argument(
+            '-u', '--user',
+            type=int,
+            help='takes the id of the user')
+        parser.add_argument(
+            '-o', '--output',
+            help='takes the path of the JSON results file')
+
+    def get_user(self, user_id):
+        users = User.objects.all()
+        if user_id is not None:
+            users = users.filter(id=user_id)
+        else:
+            users = users.filter(
+                username__startswith=USERNAME_PREFIX
+            ).annotate(
+                follows=Count('follower')
+            ).order_by('-follows', 'id')
+        user = users.first()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден, запустите generate_dataset'
+            )
+        return user
+
+    def get_cases(self, user):
+        recipe = Recipe.objects.first()
+        author = User.objects.exclude(id=user.id).exclude(
+            following__user=user
+        ).first()
+        favorite = Recipe.objects.exclude(favorites__user=user).first()
+        cart_recipe = Recipe.objects.exclude(
+            shopping_carts__user=user
+        ).first()
+        tag = Tag.objects.first()
+        ingredients = list(
+            Ingredient.objects.values_list('id', flat=True)[:5]
+        )
+        if None in (recipe, author, favorite, cart_recipe, tag) or (
+            not ingredients
+        ):
+            raise CommandError(
+                'Недостаточно данных, запустите generate_dataset'
+            )
+        search_word = recipe.name.split()[-1]
+        recipe_data = {
+            'name': 'Замер',
+            'text': 'Рецепт для замера производительности',
+            'cooking_time': 10,
+            'image': (
+                'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAA'
+                'Al21bKAAAAA1BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYA'
+                'AAAAIAAeIhvDMAAAAASUVORK5CYII='
+            ),
+            'tags': [tag.id],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in ingredients
+            ],
+        }
+        return (
+            Case('api root', 'api-root', 'get', '/api/'),
+            Case('redoc', 'redoc', 'get', '/api/docs/'),
+            Case('swagger ui', 'schema-swagger-ui', 'get', '/api/swagger/'),
+            Case('swagger schema', 'schema-json', 'get',
+                 '/api/swagger.json'),
+            Case('metrics', 'metrics', 'get', '/api/metrics/', auth='staff'),
+            Case('token login', 'login', 'post', '/api/auth/token/login/',
+                 {'email': user.email, 'password': PASSWORD}, auth=None),
+            Case('token logout', 'logout', 'post',
+                 '/api/auth/token/logout/', status=204),
+            Case('tags list', 'tag-list', 'get', '/api/tags/'),
+            Case('tag detail', 'tag-detail', 'get', f'/api/tags/{tag.id}/'),
+            Case('ingredients list', 'ingredient-list', 'get',
+                 '/api/ingredients/'),
+            Case('ingredients search', 'ingredient-list', 'get',
+                 '/api/ingredients/?name=мук'),
+            Case('ingredient detail', 'ingredient-detail', 'get',
+                 f'/api/ingredients/{ingredients[0]}/'),
+            Case('recipes list, anonymous', 'recipe-list', 'get',
+                 '/api/recipes/', auth=None),
+            Case('recipes list', 'recipe-list', 'get', '/api/recipes/'),
+            Case('recipes list, cursor', 'recipe-list', 'get',
+                 '/api/recipes/?cursor='),
+            Case('recipes list, tags filter', 'recipe-list', 'get',
+                 f'/api/recipes/?tags={tag.slug}'),
+            Case('recipes list, is_favorited', 'recipe-list', 'get',
+                 '/api/recipes/?is_favorited=1'),
+            Case('recipes list, popular', 'recipe-list', 'get',
+                 '/api/recipes/?ordering=-favorites_count'),
+            Case('recipes list, search', 'recipe-list', 'get',
+                 f'/api/recipes/?search={search_word}'),
+            Case('recipe detail', 'recipe-detail', 'get',
+                 f'/api/recipes/{recipe.id}/'),
+            Case('recipe create', 'recipe-list', 'post', '/api/recipes/',
+                 recipe_data, status=201),
+            Case('recipe update', 'recipe-detail', 'patch',
+                 lambda state: f'/api/recipes/{state["recipe create"]}/',
+                 recipe_data),
+            Case('recipe delete', 'recipe-detail', 'delete',
+                 lambda state: f'/api/recipes/{state["recipe create"]}/',
+                 status=204),
+            Case('favorite add', 'recipe-favorite', 'post',
+                 f'/api/recipes/{favorite.id}/favorite/', status=201),
+            Case('favorite remove', 'recipe-favorite', 'delete',
+                 f'/api/recipes/{favorite.id}/favorite/', status=204),
+            Case('shopping cart add', 'recipe-shopping-cart', 'post',
+                 f'/api/recipes/{cart_recipe.id}/shopping_cart/',
+                 status=201),
+            Case('shopping cart remove', 'recipe-shopping-cart', 'delete',
+                 f'/api/recipes/{cart_recipe.id}/shopping_cart/',
+                 status=204),
+            Case('download shopping cart, pdf',
+                 'recipe-download-shopping-cart', 'get',
+                 '/api/recipes/download_shopping_cart/?format=pdf'),
+            Case('download shopping cart, txt',
+                 'recipe-download-shopping-cart', 'get',
+                 '/api/recipes/download_shopping_cart/?format=txt'),
+            Case('download shopping cart, csv',
+                 'recipe-download-shopping-cart', 'get',
+                 '/api/recipes/download_shopping_cart/?format=csv'),
+            Case('shopping cart export create', 'shopping_cart_exports-list',
+                 'post', '/api/shopping_cart_exports/', {'format': 'txt'},
+                 status=201),
+            Case('shopping cart export detail',
+                 'shopping_cart_exports-detail', 'get',
+                 lambda state: (
+                     f'/api/shopping_cart_exports/'
+                     f'{state["shopping cart export create"]}/'
+                 )),
+            Case('users list', 'user-list', 'get', '/api/users/'),
+            Case('user me', 'user-me', 'get', '/api/users/me/'),
+            Case('user detail', 'user-detail', 'get',
+                 f'/api/users/{author.id}/'),
+            Case('user create', 'user-list', 'post', '/api/users/',
+                 lambda state: {
+                     'email': f'{USERNAME_PREFIX}new{state["run"]}'
+                              f'@example.com',
+                     'username': f'{USERNAME_PREFIX}new{state["run"]}',
+                     'first_name': 'Новый',
+                     'last_name': 'Пользователь',
+                     'password': PASSWORD,
+                 },
+                 auth=None, status=201),
+            Case('user delete', 'user-detail', 'delete',
+                 lambda state: f'/api/users/{state["user create"]}/',
+                 {'current_password': PASSWORD}, auth='created',
+                 status=204),
+            Case('set password', 'user-set-password', 'post',
+                 '/api/users/set_password/',
+                 {'current_password': PASSWORD, 'new_password': PASSWORD},
+                 status=204),
+            Case('subscriptions', 'user-subscriptions', 'get',
+                 '/api/users/subscriptions/'),
+            Case('subscribe', 'user-subscribe', 'post',
+                 f'/api/users/{author.id}/subscribe/', status=201),
+            Case('unsubscribe', 'user-subscribe', 'delete',
+                 f'/api/users/{author.id}/subscribe/', status=204),
+        )
+
+    def get_client(self, case, user, state):
+        client = APIClient()
+        if case.auth == 'user':
+            client.force_authenticate(user)
+        elif case.auth == 'staff':
+            client.force_authenticate(User(is_staff=True))
+        elif case.auth == 'created':
+            client.force_authenticate(
+                User.objects.get(id=state['user create'])
+            )
+        return client
+
+    def run_case(self, case, user, state):
+        client = self.get_client(case, user, state)
+        path = case.resolve(case.path, state)
+        kwargs = {}
+        if case.method != 'get':
+            kwargs = {'data': case.resolve(case.data, state), 'format': 'json'}
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, case.method)(path, **kwargs)
+            if response.streaming:
+                size = sum(
+                    len(chunk) for chunk in response.streaming_content
+                )
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - started
+        if response.status_code == case.status and case.method == 'post':
+            content = response.json() if size else {}
+            state[case.name] = content.get('id', content.get('auth_token'))
+        return response.status_code, len(queries), elapsed, size
+
+    def get_dataset(self):
+        return {
+            'users': User.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'ingredients': Ingredient.objects.count(),
+            'tags': Tag.objects.count(),
+            'favorites': Favorites.objects.count(),
+            'shopping_carts': ShoppingCart.objects.count(),
+            'follows': Follow.objects.count(),
+        }
+
+    def benchmark(self, user, repeat):
+        cases = self.get_cases(user)
+        timings = {case.name: [] for case in cases}
+        measured = {case.name: {} for case in cases}
+        state = {}
+        for run in range(repeat):
+            state['run'] = run
+            for case in cases:
+                status, queries, elapsed, size = self.run_case(
+                    case, user, state
+                )
+                timings[case.name].append(elapsed)
+                result = measured[case.name]
+                result['status'] = status
+                result['queries'] = max(result.get('queries', 0), queries)
+                result['bytes'] = size
+        results = []
+        for case in cases:
+            values = sorted(timings[case.name])
+            result = measured[case.name]
+            results.append({
+                'name': case.name,
+                'route': case.route,
+                'method': case.method.upper(),
+                'status': result['status'],
+                'expected_status': case.status,
+                'queries': result['queries'],
+                'query_budget': QUERY_BUDGETS.get(case.name),
+                'bytes': result['bytes'],
+                'min_ms': values[0] * 1000,
+                'median_ms': statistics.median(values) * 1000,
+                'p95_ms': values[int(0.95 * (len(values) - 1))] * 1000,
+                'mean_ms': statistics.mean(values) * 1000,
+            })
+        return cases, results
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('Количество повторов должно быть больше 0')
+        user = self.get_user(options['user'])
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            MEDIA_ROOT=media_root,
+        ), transaction.atomic():
+            dataset = self.get_dataset()
+            cases, results = self.benchmark(user, options['repeat'])
+            transaction.set_rollback(True)
+        covered = {case.route for case in cases}
+        failures = [
+            f'{result["name"]}: status {result["status"]}, '
+            f'expected {result["expected_status"]}'
+            for result in results
+            if result['status'] != result['expected_status']
+        ] + [
+            f'{result["name"]}: {result["queries"]} queries, '
+            f'budget {result["query_budget"]}'
+            for result in results
+            if result['query_budget'] is not None
+            and result['queries'] > result['query_budget']
+        ]
+        report = {
+            'started': now().isoformat(),
+            'database': connection.vendor,
+            'user': user.id,
+            'repeat': options['repeat'],
+            'dataset': dataset,
+            'results': results,
+            'not_covered': sorted(
+                set(iter_route_names(api_urls.urlpatterns))
+                - covered - SKIPPED_ROUTES
+            ),
+            'failures': failures,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        for result in results:
+            self.stderr.write(
+                f'{result["name"]:<32} {result["status"]} '
+                f'{result["queries"]:>3} q '
+                f'{result["median_ms"]:>9.2f} ms '
+                f'{result["bytes"]:>8} B'
+            )
+        if failures:
+            raise CommandError('\n'.join(failures))
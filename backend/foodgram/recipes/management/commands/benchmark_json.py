@@ -0,0 +1,127 @@
+import statistics
+import time
+
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.compression import COMPRESSORS, get_encodings
+from api.parsers import FastJSONParser
+from api.recipe_views import IngredientsViewSet, RecipesViewSet
+from api.renderers import FastJSONRenderer, orjson
+from recipes.models import Recipe
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = """
+    Замер сериализации JSON и сжатия ответов на текущих данных:
+    для страниц списка рецептов и списка ингредиентов печатается
+    медианное время рендеринга и разбора `JSONRenderer`/`JSONParser`
+    и `FastJSONRenderer`/`FastJSONParser`, а также размер ответа
+    без сжатия и в каждой доступной кодировке с временем сжатия.
+    Ответы рендереров должны совпадать побайтно, иначе команда
+    завершается с ошибкой.
+    Формат команды: `python manage.py benchmark_json *keys`
+    `'-r', '--repeat'` количество повторов каждого замера;
+    `'-l', '--limit'` размеры страниц списка рецептов.
+    Пример: `python manage.py benchmark_json -r 50 -l 6 100`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--repeat',
+            type=int,
+            default=20,
+            help='takes the number of runs for every measurement')
+        parser.add_argument(
+            '-l', '--limit',
+            type=int,
+            nargs='+',
+            default=[6, 50, 100],
+            help='takes the page sizes of the recipe list')
+
+    def get_payloads(self, limits):
+        payloads = []
+        recipes = RecipesViewSet.as_view({'get': 'list'})
+        ingredients = IngredientsViewSet.as_view({'get': 'list'})
+        with override_settings(CACHES=DUMMY_CACHES):
+            for limit in limits:
+                request = APIRequestFactory().get(
+                    '/api/recipes/', {'limit': limit}
+                )
+                payloads.append(
+                    (f'recipes limit={limit}', recipes(request).data)
+                )
+            request = APIRequestFactory().get('/api/ingredients/')
+            payloads.append(('ingredients', ingredients(request).data))
+        return payloads
+
+    def measure(self, repeat, function, *args):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function(*args)
+            timings.append(time.perf_counter() - started)
+        return result, statistics.median(timings) * 1000
+
+    def parse(self, parser, content):
+        return parser.parse(BytesIO(content))
+
+    def report(self, label, data, repeat):
+        """Печатает замеры одного ответа, возвращает совпадение вывода."""
+        content, render_ms = self.measure(repeat, JSONRenderer().render, data)
+        fast_content, fast_render_ms = self.measure(
+            repeat, FastJSONRenderer().render, data
+        )
+        _, parse_ms = self.measure(repeat, self.parse, JSONParser(), content)
+        _, fast_parse_ms = self.measure(
+            repeat, self.parse, FastJSONParser(), content
+        )
+        self.stdout.write(
+            f'{label:<20} render {render_ms:8.3f} -> {fast_render_ms:8.3f} ms '
+            f'(x{render_ms / max(fast_render_ms, 1e-9):.1f}), '
+            f'parse {parse_ms:8.3f} -> {fast_parse_ms:8.3f} ms '
+            f'(x{parse_ms / max(fast_parse_ms, 1e-9):.1f})'
+        )
+        sizes = [f'identity {len(content)} B']
+        for encoding in get_encodings():
+            compress, _ = COMPRESSORS[encoding]
+            compressed, compress_ms = self.measure(repeat, compress, content)
+            sizes.append(
+                f'{encoding} {len(compressed)} B '
+                f'({len(compressed) / len(content):.1%}, '
+                f'{compress_ms:.3f} ms)'
+            )
+        self.stdout.write(f'{"":<20} ' + ', '.join(sizes))
+        return content == fast_content
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('Количество повторов должно быть больше 0')
+        if not Recipe.objects.exists():
+            raise CommandError('Рецептов нет, запустите generate_dataset')
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    'orjson не установлен, FastJSONRenderer использует '
+                    'JSONRenderer'
+                )
+            )
+        mismatches = [
+            label
+            for label, data in self.get_payloads(options['limit'])
+            if not self.report(label, data, options['repeat'])
+        ]
+        if mismatches:
+            raise CommandError(
+                'Вывод рендереров не совпадает: ' + '; '.join(mismatches)
+            )
+        self.stdout.write(self.style.SUCCESS('Renderers output is identical'))
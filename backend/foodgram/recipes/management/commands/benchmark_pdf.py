@@ -0,0 +1,61 @@
+import re
+import time
+
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_list_files import (
+    get_shopping_cart_pdf, register_pdf_font,
+)
+
+PAGE_PATTERN = re.compile(rb'/Type /Page\b')
+
+
+class Command(BaseCommand):
+    help = """
+    Замер времени построения PDF списка покупок.
+    Формат команды: `python manage.py benchmark_pdf *keys`
+    `'-s', '--sizes'` количество строк в списке покупок, можно несколько;
+    `'-r', '--repeat'` количество повторов для каждого размера.
+    Пример: `python manage.py benchmark_pdf -s 10 100 1000 -r 5`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-s', '--sizes',
+            nargs='+',
+            type=int,
+            default=(10, 100, 1000),
+            help='takes the numbers of shopping list lines')
+        parser.add_argument(
+            '-r', '--repeat',
+            type=int,
+            default=5,
+            help='takes the number of runs for every size')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        register_pdf_font()
+        self.stdout.write(
+            f'font registration: '
+            f'{(time.perf_counter() - started) * 1000:.2f} ms (once)'
+        )
+        for size in options['sizes']:
+            items = [
+                {'name': f'ингредиент {i}', 'amount': i, 'unit': 'г'}
+                for i in range(size)
+            ]
+            timings = []
+            for _ in range(options['repeat']):
+                buffer = BytesIO()
+                started = time.perf_counter()
+                get_shopping_cart_pdf(items, buffer)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f'{size:>6} lines: '
+                f'best {min(timings) * 1000:.2f} ms, '
+                f'mean {sum(timings) / len(timings) * 1000:.2f} ms, '
+                f'{buffer.getbuffer().nbytes} bytes, '
+                f'{len(PAGE_PATTERN.findall(buffer.getvalue()))} pages'
+            )
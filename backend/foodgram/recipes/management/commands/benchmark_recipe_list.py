@@ -0,0 +1,137 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.recipe_views import RecipesViewSet
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = """
+    Сравнение списка рецептов, собранного `RecipesForReadingSerializer`,
+    и быстрого пути `RECIPE_LIST_FAST_PATH` на текущих данных:
+    ответы должны совпадать побайтно, иначе команда завершается с ошибкой.
+    Для каждого варианта запроса печатается медианное время и количество
+    SQL-запросов обоих способов. Кеш ответов на время замера отключается.
+    Формат команды: `python manage.py benchmark_recipe_list *keys`
+    `'-r', '--repeat'` количество повторов каждого запроса;
+    `'-u', '--user'` `id` пользователя для запросов с авторизацией,
+    по умолчанию - автор первого рецепта;
+    `'-l', '--limit'` размер страницы.
+    Пример: `python manage.py benchmark_recipe_list -r 20 -l 50`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--repeat',
+            type=int,
+            default=10,
+            help='takes the number of runs for every request')
+        parser.add_argument(
+            '-u', '--user',
+            type=int,
+            help='takes the id of the user')
+        parser.add_argument(
+            '-l', '--limit',
+            type=int,
+            default=6,
+            help='takes the page size')
+
+    def get_queries(self, limit):
+        recipe = Recipe.objects.select_related('author').first()
+        tag = Tag.objects.first()
+        queries = [
+            f'limit={limit}',
+            f'limit={limit}&page=2',
+            f'limit={limit}&cursor=',
+            f'limit={limit}&is_favorited=1',
+            f'limit={limit}&is_in_shopping_cart=1',
+            f'limit={limit}&ordering=-favorites_count',
+            f'limit={limit}&author={recipe.author_id}',
+            f'limit={limit}&search={recipe.name.split()[-1]}',
+        ]
+        if tag is not None:
+            queries.append(f'limit={limit}&tags={tag.slug}')
+        return queries
+
+    def run(self, view, query, user, fast):
+        request = APIRequestFactory().get(f'/api/recipes/?{query}')
+        if user is not None:
+            force_authenticate(request, user)
+        with override_settings(
+            RECIPE_LIST_FAST_PATH=fast
+        ), CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            elapsed = time.perf_counter() - started
+        return response, elapsed, len(queries)
+
+    def compare(self, view, query, user, repeat):
+        """Печатает замер варианта запроса, возвращает совпадение ответов."""
+        label = f'{"anonymous" if user is None else "user"} ?{query}'
+        timings = {False: [], True: []}
+        results = {}
+        for _ in range(repeat):
+            for fast in (False, True):
+                response, elapsed, queries = self.run(view, query, user, fast)
+                timings[fast].append(elapsed)
+                results[fast] = (response, queries)
+        (slow, slow_queries), (fast, fast_queries) = (
+            results[False], results[True]
+        )
+        same = (
+            slow.status_code == fast.status_code
+            and slow.content == fast.content
+        )
+        slow_ms = statistics.median(timings[False]) * 1000
+        fast_ms = statistics.median(timings[True]) * 1000
+        self.stdout.write(
+            f'{label:<55} '
+            f'serializer {slow_ms:8.2f} ms {slow_queries:>2} q, '
+            f'values {fast_ms:8.2f} ms {fast_queries:>2} q, '
+            f'x{slow_ms / max(fast_ms, 1e-9):.1f}'
+            f'{"" if same else ", MISMATCH"}'
+        )
+        return label, same
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('Количество повторов должно быть больше 0')
+        recipe = Recipe.objects.select_related('author').first()
+        if recipe is None:
+            raise CommandError('Рецептов нет, запустите generate_dataset')
+        user = recipe.author
+        if options['user'] is not None:
+            user = User.objects.filter(id=options['user']).first()
+            if user is None:
+                raise CommandError('Пользователь не найден')
+        view = RecipesViewSet.as_view({'get': 'list'})
+        mismatches = []
+        with override_settings(
+            CACHES=DUMMY_CACHES,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            for query in self.get_queries(options['limit']):
+                for current_user in (None, user):
+                    label, same = self.compare(
+                        view, query, current_user, options['repeat']
+                    )
+                    if not same:
+                        mismatches.append(label)
+        if mismatches:
+            raise CommandError(
+                'Ответы не совпадают: ' + '; '.join(mismatches)
+            )
+        self.stdout.write(self.style.SUCCESS('Responses are identical'))
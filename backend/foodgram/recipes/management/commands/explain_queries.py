@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils.timezone import now
+
+from recipes.models import IngredientAmount, Recipe, RecipeTags, Tag
+from users.models import Follow
+
+User = get_user_model()
+PAGE_SIZE = 6
+
+
+class Command(BaseCommand):
+    help = """
+    Команда печатает планы выполнения (`EXPLAIN`) основных запросов API,
+    чтобы проверить использование индексов в SQLite и PostgreSQL.
+    Формат команды: `python manage.py explain_queries *keys`
+    `'-u', '--user'` ключ указывает `id` пользователя, от имени которого
+    строятся запросы; по умолчанию берётся первый пользователь.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-u', '--user',
+            type=int,
+            help='takes the id of the user')
+
+    def get_queries(self, user):
+        recipe_ids = list(
+            Recipe.objects.values_list('id', flat=True)[:PAGE_SIZE]
+        )
+        author_ids = list(
+            user.follower.values_list('author_id', flat=True)[:PAGE_SIZE]
+        )
+        last_recipe = Recipe.objects.last() or Recipe(id=0, pub_date=now())
+        tag = Tag.objects.first() or Tag()
+        return (
+            (
+                'Лента рецептов',
+                Recipe.objects.with_user_flags(user).select_related(
+                    'author'
+                )[:PAGE_SIZE],
+            ),
+            (
+                'Лента рецептов, курсорная страница',
+                Recipe.objects.filter(
+                    Q(pub_date__lt=last_recipe.pub_date)
+                    | Q(pub_date=last_recipe.pub_date, id__lt=last_recipe.id)
+                )[:PAGE_SIZE],
+            ),
+            (
+                'Популярные рецепты',
+                Recipe.objects.order_by(
+                    '-favorites_count', *Recipe._meta.ordering
+                )[:PAGE_SIZE],
+            ),
+            (
+                'Фильтр ленты по тэгу',
+                Recipe.objects.filter(
+                    Exists(
+                        RecipeTags.objects.filter(
+                            recipe=OuterRef('pk'), tag_id__in=(tag.id,)
+                        )
+                    )
+                )[:PAGE_SIZE],
+            ),
+            (
+                'Тэги рецептов страницы',
+                Tag.objects.filter(recipes__in=recipe_ids),
+            ),
+            (
+                'Ингредиенты рецептов страницы',
+                IngredientAmount.objects.select_related(
+                    'ingredient'
+                ).filter(recipe__in=recipe_ids),
+            ),
+            (
+                'Избранное пользователя',
+                Recipe.objects.filter(favorites__user=user)[:PAGE_SIZE],
+            ),
+            (
+                'Подписки пользователя',
+                Follow.objects.filter(user=user).select_related(
+                    'author'
+                ).annotate(
+                    recipes_count=Count('author__recipes')
+                ).order_by('-id')[:PAGE_SIZE],
+            ),
+            (
+                'Авторы, на которых подписан пользователь',
+                user.follower.values_list('author_id', flat=True),
+            ),
+            (
+                'Последние рецепты авторов подписок',
+                Recipe.objects.top_for_authors(author_ids, PAGE_SIZE),
+            ),
+            (
+                'Список покупок пользователя',
+                user.shopping_list.values(
+                    'amount', name=F('ingredient__name')
+                ).order_by('name'),
+            ),
+        )
+
+    def explain(self, queryset):
+        if hasattr(queryset, 'explain'):
+            return queryset.explain()
+        with connection.cursor() as cursor:
+            explain_prefix = connection.ops.explain_query_prefix()
+            cursor.execute(
+                f'{explain_prefix} {queryset.raw_query}', queryset.params
+            )
+            return '\n'.join(
+                ' '.join(map(str, row)) for row in cursor.fetchall()
+            )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user'] is not None:
+            users = users.filter(id=options['user'])
+        user = users.order_by('id').first()
+        if user is None:
+            raise CommandError('Пользователь не найден')
+        for title, queryset in self.get_queries(user):
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(self.explain(queryset))
+            self.stdout.write('')
@@ -1,12 +1,19 @@
 import codecs
 import csv
+import json
 import os
+import time
+
+from itertools import islice
 
 from django.apps import apps
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.db.models import ForeignKey
 
+DEFAULT_BATCH_SIZE = 1000
+
 
 def get_fk_model(model, fieldname):
     field_object = model._meta.get_field(fieldname)
@@ -23,17 +30,77 @@ def csv_parser(csv_filename):
                 yield row
 
 
-def insert_data(model, file):
+def json_parser(json_filename):
+    with open(json_filename, encoding='utf-8') as json_fd:
+        yield from json.load(json_fd)
+
+
+def get_file_path(file):
+    if os.path.isfile(file):
+        return file
     if settings.STATICFILES_DIRS:
         base_dir = settings.STATICFILES_DIRS[0]
     else:
         base_dir = settings.STATIC_ROOT
-    file_path = os.path.join(base_dir, 'data')
+    return os.path.join(base_dir, 'data', file)
+
+
+def read_rows(file_path, fields=None):
+    """
+    Читает строки файла `.csv` или `.json` как словари.
+    Заголовок CSV берётся из `fields`, а если он не передан -
+    из первой строки файла.
+    """
+    if file_path.endswith('.json'):
+        yield from json_parser(file_path)
+        return
+    rows = csv_parser(file_path)
+    header = fields or next(rows, [])
+    for row in rows:
+        yield dict(zip(header, row))
+
+
+def bulk_insert_data(model, rows, batch_size=DEFAULT_BATCH_SIZE,
+                     ignore_conflicts=False, report=None):
+    """
+    Загружает строки в таблицу модели пачками `bulk_create` в одной
+    транзакции. Внешние ключи записываются напрямую в `<поле>_id`.
+    `report(count, elapsed)` вызывается после каждой пачки.
+    Возвращает количество обработанных строк.
+    """
+    attnames = {}
+
+    def build(row):
+        kwargs = {}
+        for field, value in row.items():
+            if field not in attnames:
+                attnames[field] = model._meta.get_field(field).attname
+            kwargs[attnames[field]] = value
+        return model(**kwargs)
+
+    instances = map(build, rows)
+    count = 0
+    started = time.perf_counter()
+    with transaction.atomic():
+        while True:
+            batch = list(islice(instances, batch_size))
+            if not batch:
+                break
+            model.objects.bulk_create(
+                batch, ignore_conflicts=ignore_conflicts
+            )
+            count += len(batch)
+            if report is not None:
+                report(count, time.perf_counter() - started)
+    return count
+
+
+def insert_data(model, file):
     is_header = True
     header = []
     model_instanse = model()
     id = 1
-    for row in csv_parser(os.path.join(file_path, file)):
+    for row in csv_parser(get_file_path(file)):
         if is_header:
             header += row
             is_header = False
@@ -61,6 +128,15 @@ class Command(BaseCommand):
     Пример команды для заполнения данными о пользователях в модели `Title`
     приложения `reviews` из файла `titles.csv`:
     `python manage.py filling -a reviews -m Title -f titles.csv`
+    Режим пакетной загрузки включается ключом `--bulk`:
+    `'-b', '--batch-size'` размер пачки `bulk_create`;
+    `'--ignore-conflicts'` пропускает строки, нарушающие уникальность,
+    что позволяет запускать загрузку повторно;
+    `'--fields'` задаёт колонки CSV файла без заголовка.
+    Кроме `.csv` поддерживаются файлы `.json` со списком объектов.
+    Пример загрузки ингредиентов:
+    `python manage.py filling -a recipes -m Ingredient -f ingredients.json
+    --bulk --ignore-conflicts`
     """
 
     def add_arguments(self, parser):
@@ -76,11 +152,44 @@ class Command(BaseCommand):
             '-f', '--file',
             required=True,
             help='accepts a filename with extension')
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='loads rows with batched bulk_create in a transaction')
+        parser.add_argument(
+            '-b', '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='takes the number of rows in a bulk_create batch')
+        parser.add_argument(
+            '--ignore-conflicts',
+            action='store_true',
+            help='skips rows that violate unique constraints')
+        parser.add_argument(
+            '--fields',
+            nargs='+',
+            help='takes the column names of a csv file without a header')
+
+    def report(self, count, elapsed):
+        self.stdout.write(
+            f'{count} rows, {count / max(elapsed, 1e-9):.0f} rows/s'
+        )
 
     def handle(self, *args, **options):
         try:
             model = apps.get_model(options['app'], options['model'])
-            insert_data(model, options['file'])
+            if options['bulk']:
+                bulk_insert_data(
+                    model,
+                    read_rows(
+                        get_file_path(options['file']), options['fields']
+                    ),
+                    batch_size=options['batch_size'],
+                    ignore_conflicts=options['ignore_conflicts'],
+                    report=self.report,
+                )
+            else:
+                insert_data(model, options['file'])
         except Exception as e:
             raise CommandError(f'{e}')
 
@@ -0,0 +1,337 @@
+import random
+import time
+
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+
+from recipes.cache import INGREDIENTS, RECIPES, TAGS, bump_generation
+from recipes.favorites import reconcile_favorites_count
+from recipes.images import DERIVATIVE_FIELDS, make_image_derivatives
+from recipes.management.commands.filling import (
+    bulk_insert_data, get_file_path, read_rows,
+)
+from recipes.models import (
+    Favorites, Ingredient, IngredientAmount, Recipe, RecipeTags, ShoppingCart,
+    Tag,
+)
+from recipes.shopping_list import rebuild_shopping_lists
+from users.models import Follow
+
+User = get_user_model()
+USERNAME_PREFIX = 'bench_'
+PASSWORD = 'bench-password'
+TAG_COLORS = ('#E26C2D', '#49B64E', '#8775D2', '#F2C94C', '#2D9CDB')
+BATCH_SIZE = 1000
+
+
+def zipf_weights(size, exponent):
+    """
+    Накопленные веса степенного распределения `1 / rank ** exponent`
+    для `random.choices(cum_weights=...)`.
+    """
+    return list(
+        accumulate(1 / (rank ** exponent) for rank in range(1, size + 1))
+    )
+
+
+def pick_distinct(rng, population, cum_weights, count):
+    """Выбирает до `count` разных элементов с учётом весов."""
+    count = min(count, len(population))
+    picked = set()
+    for _ in range(count * 4):
+        if len(picked) >= count:
+            break
+        picked.update(
+            rng.choices(
+                population, cum_weights=cum_weights, k=count - len(picked)
+            )
+        )
+    return picked
+
+
+def edge_count(rng, mean, exponent):
+    """Число связей пользователя с тяжёлым хвостом и средним около `mean`."""
+    scale = mean * (exponent - 1) / exponent
+    return int(scale * rng.paretovariate(exponent))
+
+
+class Command(BaseCommand):
+    help = """
+    Команда для генерации синтетических данных для замеров производительности:
+    пользователи, рецепты с 5-30 ингредиентами, тэги, избранное, списки
+    покупок и подписки со степенным распределением популярности.
+    Формат команды: `python manage.py generate_dataset *keys`
+    `'-u', '--users'` количество пользователей;
+    `'-r', '--recipes'` количество рецептов;
+    `'-t', '--tags'` количество тэгов;
+    `'--favorites'`, `'--carts'`, `'--follows'` среднее количество
+    соответствующих связей на пользователя;
+    `'-f', '--file'` файл ингредиентов, используется, если ингредиентов
+    в базе нет;
+    `'--seed'` начальное значение генератора случайных чисел;
+    `'--clear'` удаляет сгенерированных ранее пользователей и их данные.
+    Пароль сгенерированных пользователей - `bench-password`.
+    Пример: `python manage.py generate_dataset -u 1000 -r 10000 --clear`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-u', '--users',
+            type=int,
+            default=200,
+            help='takes the number of users')
+        parser.add_argument(
+            '-r', '--recipes',
+            type=int,
+            default=2000,
+            help='takes the number of recipes')
+        parser.add_argument(
+            '-t', '--tags',
+            type=int,
+            default=10,
+            help='takes the number of tags')
+        parser.add_argument(
+            '--favorites',
+            type=int,
+            default=20,
+            help='takes the mean number of favorites per user')
+        parser.add_argument(
+            '--carts',
+            type=int,
+            default=5,
+            help='takes the mean number of shopping cart recipes per user')
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=10,
+            help='takes the mean number of subscriptions per user')
+        parser.add_argument(
+            '-f', '--file',
+            default='ingredients.csv',
+            help='takes the ingredients file')
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='takes the random seed')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='deletes previously generated users with their data')
+
+    def step(self, title, count):
+        self.stdout.write(
+            f'{title}: {count} '
+            f'({time.perf_counter() - self.started:.1f} s)'
+        )
+
+    def load_ingredients(self, file):
+        if not Ingredient.objects.exists():
+            bulk_insert_data(
+                Ingredient,
+                read_rows(get_file_path(file), ('name', 'measurement_unit')),
+                ignore_conflicts=True,
+            )
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        self.step('ingredients', len(ingredient_ids))
+        return ingredient_ids
+
+    def create_tags(self, count):
+        Tag.objects.bulk_create(
+            (
+                Tag(
+                    name=f'Тэг {number}',
+                    slug=f'bench-tag-{number}',
+                    color=TAG_COLORS[number % len(TAG_COLORS)],
+                )
+                for number in range(1, count + 1)
+            ),
+            ignore_conflicts=True,
+        )
+        tag_ids = list(
+            Tag.objects.filter(
+                slug__startswith='bench-tag-'
+            ).values_list('id', flat=True)
+        )
+        self.step('tags', len(tag_ids))
+        return tag_ids
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{USERNAME_PREFIX}{number}',
+                    email=f'{USERNAME_PREFIX}{number}@example.com',
+                    first_name='Пользователь',
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(1, count + 1)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        user_ids = list(
+            User.objects.filter(
+                username__startswith=USERNAME_PREFIX
+            ).order_by('id').values_list('id', flat=True)
+        )
+        self.step('users', len(user_ids))
+        return user_ids
+
+    def create_image(self):
+        """Одно изображение и его копии на все рецепты."""
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (226, 108, 45)).save(buffer, 'JPEG')
+        recipe = Recipe()
+        recipe.image.save(
+            'bench.jpg', ContentFile(buffer.getvalue()), save=False
+        )
+        make_image_derivatives(recipe)
+        return {
+            field: getattr(recipe, field).name
+            for field in ('image', *DERIVATIVE_FIELDS)
+        }
+
+    def create_recipes(self, rng, count, author_ids, ingredient_ids,
+                       tag_ids, exponent):
+        images = self.create_image()
+        words = list(
+            Ingredient.objects.values_list('name', flat=True)[:500]
+        ) or ['ингредиент']
+        authors = rng.choices(
+            author_ids,
+            cum_weights=zipf_weights(len(author_ids), exponent),
+            k=count,
+        )
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=author_id,
+                    name=f'Рецепт {number} {rng.choice(words)}',
+                    text=' '.join(rng.choices(words, k=rng.randint(20, 80))),
+                    cooking_time=rng.randint(1, 240),
+                    **images,
+                )
+                for number, author_id in enumerate(authors, 1)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(
+                author_id__in=author_ids
+            ).order_by('id').values_list('id', flat=True)
+        )
+        self.step('recipes', len(recipe_ids))
+        bulk_insert_data(
+            IngredientAmount,
+            (
+                {'recipe': recipe_id, 'ingredient': ingredient_id,
+                 'amount': rng.randint(1, 500)}
+                for recipe_id in recipe_ids
+                for ingredient_id in rng.sample(
+                    ingredient_ids,
+                    min(rng.randint(5, 30), len(ingredient_ids))
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.step(
+            'ingredient amounts',
+            IngredientAmount.objects.filter(recipe__in=recipe_ids).count()
+        )
+        bulk_insert_data(
+            RecipeTags,
+            (
+                {'recipe': recipe_id, 'tag': tag_id}
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids, min(rng.randint(1, 3), len(tag_ids))
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return recipe_ids
+
+    def create_edges(self, rng, model, target_field, user_ids, targets,
+                     mean, exponent):
+        """
+        Связи пользователей с рецептами или авторами: число связей
+        пользователя и популярность цели распределены по степенному закону.
+        """
+        cum_weights = zipf_weights(len(targets), exponent)
+        shuffled = list(targets)
+        rng.shuffle(shuffled)
+        created = bulk_insert_data(
+            model,
+            (
+                {'user': user_id, target_field: target}
+                for user_id in user_ids
+                for target in pick_distinct(
+                    rng, shuffled, cum_weights,
+                    edge_count(rng, mean, exponent)
+                )
+                if target != user_id or target_field != 'author'
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.step(model._meta.verbose_name_plural, created)
+
+    def clear(self):
+        deleted, _ = User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).delete()
+        self.step('deleted objects', deleted)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно не меньше 2 пользователей и 1 рецепта')
+        if options['tags'] < 1:
+            raise CommandError('Нужен хотя бы один тэг')
+        rng = random.Random(options['seed'])
+        exponent = 1.2
+        self.started = time.perf_counter()
+        with transaction.atomic():
+            if options['clear']:
+                self.clear()
+            elif User.objects.filter(
+                username__startswith=USERNAME_PREFIX
+            ).exists():
+                raise CommandError(
+                    'Сгенерированные данные уже есть, используйте --clear'
+                )
+            ingredient_ids = self.load_ingredients(options['file'])
+            tag_ids = self.create_tags(options['tags'])
+            user_ids = self.create_users(options['users'])
+            recipe_ids = self.create_recipes(
+                rng, options['recipes'], user_ids, ingredient_ids, tag_ids,
+                exponent
+            )
+            self.create_edges(
+                rng, Favorites, 'recipe', user_ids, recipe_ids,
+                options['favorites'], exponent
+            )
+            self.create_edges(
+                rng, ShoppingCart, 'recipe', user_ids, recipe_ids,
+                options['carts'], exponent
+            )
+            self.create_edges(
+                rng, Follow, 'author', user_ids, user_ids,
+                options['follows'], exponent
+            )
+            self.step('shopping list rows', rebuild_shopping_lists(user_ids))
+            self.step('favorites counters', reconcile_favorites_count())
+            bump_generation(INGREDIENTS, TAGS, RECIPES)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully generated dataset in '
+                f'{time.perf_counter() - self.started:.1f} s'
+            )
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import DERIVATIVE_FIELDS, make_image_derivatives
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = """
+    Команда создаёт уменьшенные копии изображений рецептов, у которых их
+    ещё нет.
+    Формат команды: `python manage.py generate_image_derivatives *keys`
+    `'--force'` ключ пересоздаёт копии для всех рецептов.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='regenerates derivatives of every recipe image')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['force']:
+            recipes = recipes.filter(image_card='')
+        count = failed = 0
+        for recipe in recipes.iterator():
+            try:
+                make_image_derivatives(recipe)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'{recipe.id}: {error}')
+                continue
+            recipe.save(update_fields=DERIVATIVE_FIELDS)
+            count += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully generated derivatives for {count} recipes, '
+                f'failed: {failed}'
+            )
+        )
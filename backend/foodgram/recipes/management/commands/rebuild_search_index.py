@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = """
+    Команда для пересоздания полнотекстового индекса рецептов и его
+    триггеров (`tsvector` в PostgreSQL, FTS5 в SQLite) с заполнением
+    по текущим рецептам. Нужна после массовой загрузки данных в обход
+    базы или после миграций SQLite, пересоздающих таблицу рецептов.
+    Формат команды: `python manage.py rebuild_search_index`
+    """
+
+    def handle(self, *args, **options):
+        install_search_index()
+        self.stdout.write(
+            self.style.SUCCESS('Successfully rebuilt recipe search index')
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_list import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = """
+    Команда для пересборки сводных списков покупок пользователей
+    (`ShoppingListItem`) по содержимому их корзин.
+    Формат команды: `python manage.py rebuild_shopping_lists *keys`
+    `'-u', '--user'` ключ указывает `id` пользователя, можно несколько;
+    без ключа пересобираются списки всех пользователей.
+    Пример: `python manage.py rebuild_shopping_lists -u 1 2`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-u', '--user',
+            nargs='+',
+            type=int,
+            help='takes the ids of users')
+
+    def handle(self, *args, **options):
+        created = rebuild_shopping_lists(options['user'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully rebuilt shopping lists: {created} rows'
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.favorites import reconcile_favorites_count
+
+
+class Command(BaseCommand):
+    help = """
+    Команда для сверки счётчиков `favorites_count` рецептов с таблицей
+    избранного и исправления расхождений.
+    Формат команды: `python manage.py reconcile_favorites_count *keys`
+    `'-r', '--recipe'` ключ указывает `id` рецепта, можно несколько;
+    без ключа проверяются все рецепты.
+    Пример: `python manage.py reconcile_favorites_count -r 1 2`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--recipe',
+            nargs='+',
+            type=int,
+            help='takes the ids of recipes')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_favorites_count(options['recipe'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully reconciled favorites count: {fixed} recipes'
+            )
+        )
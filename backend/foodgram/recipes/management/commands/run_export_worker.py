@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes.connections import close_unusable_connections
+from recipes.exports import claim_export, run_export
+
+
+class Command(BaseCommand):
+    help = """
+    Команда запускает обработчик очереди выгрузок списков покупок
+    (`ShoppingListExport`): файлы создаются в медиа-хранилище.
+    Формат команды: `python manage.py run_export_worker *keys`
+    `'--once'` ключ обрабатывает задания, накопившиеся в очереди,
+    и завершает работу.
+    `'-i', '--interval'` ключ задаёт паузу в секундах между опросами
+    пустой очереди, по умолчанию 1.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='processes pending jobs and exits')
+        parser.add_argument(
+            '-i', '--interval',
+            type=float,
+            default=1,
+            help='takes the polling interval in seconds')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            close_old_connections()
+            close_unusable_connections(idle=0)
+            export = claim_export()
+            if export is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            run_export(export)
+            processed += 1
+            self.stdout.write(
+                f'Export {export.id} ({export.format}): {export.status}'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully processed {processed} exports')
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+def remove_duplicate_recipe_tags(apps, schema_editor):
+    RecipeTags = apps.get_model('recipes', 'RecipeTags')
+    kept_ids = RecipeTags.objects.values(
+        'recipe_id', 'tag_id'
+    ).annotate(kept_id=models.Min('id')).values('kept_id')
+    RecipeTags.objects.exclude(id__in=kept_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_recipe_tags, migrations.RunPython.noop
+        ),
+    ]
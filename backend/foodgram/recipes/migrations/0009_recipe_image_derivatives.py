@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_index_audit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_card',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/card/', verbose_name='изображение для карточки'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_card_webp',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/card/', verbose_name='изображение для карточки в WebP'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/thumbnail/', verbose_name='миниатюра изображения'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 03:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_recipe_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('pdf', 'PDF'), ('txt', 'текст'), ('csv', 'CSV')], default='pdf', max_length=3, verbose_name='формат')),
+                ('status', models.CharField(choices=[('pending', 'в очереди'), ('running', 'выполняется'), ('done', 'готово'), ('failed', 'ошибка')], default='pending', max_length=7, verbose_name='статус')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='файл')),
+                ('error', models.TextField(blank=True, verbose_name='ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создано')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='завершено')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_exports', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'выгрузка списка покупок',
+                'verbose_name_plural': 'выгрузки списков покупок',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglistexport',
+            index=models.Index(fields=['status', 'id'], name='export_status_id_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 03:10
+
+from django.db import migrations
+
+from recipes.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_favorites_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
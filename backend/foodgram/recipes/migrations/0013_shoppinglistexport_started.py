@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppinglistexport',
+            name='started',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='начато'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 04:02
+
+from django.db import migrations, models
+import django.utils.timezone
+import recipes.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_shoppinglistexport_started'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='данные')),
+                ('generation', models.PositiveBigIntegerField(default=recipes.models.initial_generation, verbose_name='поколение')),
+                ('modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='изменено')),
+            ],
+            options={
+                'verbose_name': 'версия данных',
+                'verbose_name_plural': 'версии данных',
+            },
+        ),
+    ]
@@ -1,9 +1,19 @@
+import time
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 from pytils.translit import slugify
 
+from recipes.images import (
+    DERIVATIVE_FIELDS, delete_replaced_images, get_image_names,
+    make_image_derivatives,
+)
+from recipes.search import search_recipes
+
 User = get_user_model()
 
 
@@ -65,6 +75,87 @@ class Ingredient(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Queryset рецептов."""
+
+    def with_related(self):
+        """
+        Подгружает автора, тэги и ингредиенты рецептов фиксированным
+        количеством запросов, независимо от числа рецептов.
+        """
+        return self.select_related('author').prefetch_related(
+            models.Prefetch('tags', queryset=Tag.objects.all()),
+            models.Prefetch(
+                'ingredient_amounts',
+                queryset=IngredientAmount.objects.select_related(
+                    'ingredient'
+                ).order_by('id'),
+            ),
+        )
+
+    def with_user_flags(self, user):
+        """
+        Аннотирует рецепты флагами `is_favorited` и `is_in_shopping_cart`
+        для переданного пользователя подзапросами `EXISTS`.
+        Для анонимного пользователя флаги равны False без обращения к БД.
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(
+                Favorites.objects.filter(
+                    user=user, recipe=models.OuterRef('pk')
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                ShoppingCart.objects.filter(
+                    user=user, recipe=models.OuterRef('pk')
+                )
+            ),
+        )
+
+    def search(self, query):
+        """
+        Полнотекстовый поиск по названию и описанию рецепта с аннотацией
+        релевантности `search_rank`, см. `recipes.search`.
+        """
+        return search_recipes(self, query)
+
+    def top_for_authors(self, author_ids, limit):
+        """
+        Возвращает не более `limit` последних рецептов каждого из авторов
+        `author_ids` одним запросом с оконной функцией
+        `ROW_NUMBER() OVER (PARTITION BY author_id)`.
+        """
+        if not author_ids:
+            return self.none()
+        ranked = self.filter(author_id__in=author_ids).annotate(
+            row_number=models.Window(
+                expression=RowNumber(),
+                partition_by=models.F('author_id'),
+                order_by=(
+                    models.F('pub_date').desc(), models.F('id').desc()
+                ),
+            )
+        ).only(
+            'id', 'name', 'image', 'image_card', 'image_thumbnail',
+            'image_card_webp', 'cooking_time', 'author_id'
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        return self.model._default_manager.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+            f'ORDER BY author_id, row_number',
+            (*params, limit),
+        )
+
+
 class Recipe(models.Model):
     """Рецепт."""
     tags = models.ManyToManyField(
@@ -87,6 +178,24 @@ class Recipe(models.Model):
     )
     name = models.CharField('название', max_length=TWO_HUNDRED_LENGTH)
     image = models.ImageField('изображение', upload_to='recipes/')
+    image_card = models.ImageField(
+        'изображение для карточки',
+        upload_to='recipes/card/',
+        blank=True,
+        editable=False
+    )
+    image_thumbnail = models.ImageField(
+        'миниатюра изображения',
+        upload_to='recipes/thumbnail/',
+        blank=True,
+        editable=False
+    )
+    image_card_webp = models.ImageField(
+        'изображение для карточки в WebP',
+        upload_to='recipes/card/',
+        blank=True,
+        editable=False
+    )
     text = models.TextField('описание')
     cooking_time = models.PositiveSmallIntegerField(
         'время приготовления',
@@ -96,15 +205,70 @@ class Recipe(models.Model):
         'дата публикации',
         auto_now=True
     )
+    favorites_count = models.PositiveIntegerField(
+        'количество добавлений в избранное',
+        default=0,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_favorites_count_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_image_names = get_image_names(instance)
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        При сохранении нового или изменённого изображения создаёт его
+        уменьшенные копии для карточек и миниатюр и сохраняет их вместе
+        с рецептом; файлы прежнего изображения и копий удаляются после
+        фиксации транзакции. Копии для рецептов, сохранённых до их
+        появления, создаёт команда `generate_image_derivatives`, а не
+        сохранение рецепта.
+        Счётчик `favorites_count` меняется только сигналами `Favorites`,
+        поэтому при обновлении рецепта он не перезаписывается значением,
+        загруженным вместе с объектом.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'favorites_count'
+            ]
+        loaded_names = getattr(self, 'loaded_image_names', {})
+        if self.image and self.image.name != loaded_names.get('image'):
+            make_image_derivatives(self)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], *DERIVATIVE_FIELDS
+                }
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        delete_replaced_images(self, {
+            field: name for field, name in loaded_names.items()
+            if update_fields is None or field in update_fields
+        })
+        self.loaded_image_names = get_image_names(self)
+
 
 class IngredientAmount(models.Model):
     """Количество ингредиента в рецепте."""
@@ -151,12 +315,19 @@ class RecipeTags(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         related_name='recipe_tags',
-        verbose_name='рецепт'
+        verbose_name='рецепт',
+        db_index=False
     )
 
     class Meta:
         verbose_name = 'Тег рецепта'
         verbose_name_plural = 'Теги рецепта'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'tag'),
+                name='unique_recipe_tag'
+            ),
+        )
 
     def __str__(self):
         return f'{self.tag.name} - {self.recipe.name}'
@@ -174,7 +345,8 @@ class Favorites(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         verbose_name='рецепт',
-        related_name='favorites'
+        related_name='favorites',
+        db_index=False
     )
 
     class Meta:
@@ -186,6 +358,12 @@ class Favorites(models.Model):
                 name='unique_favorites_recipe'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favorites_recipe_user_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.recipe.name} - {self.user.username}'
@@ -203,7 +381,8 @@ class ShoppingCart(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         related_name='shopping_carts',
-        verbose_name='рецепт'
+        verbose_name='рецепт',
+        db_index=False
     )
 
     class Meta:
@@ -215,6 +394,123 @@ class ShoppingCart(models.Model):
                 name='unique_shopping_cart_recipe'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe', 'user'),
+                name='shopping_cart_recipe_user_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.recipe.name} - {self.user.username}'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Суммарное количество ингредиента в списке покупок пользователя.
+    Таблица поддерживается сигналами `ShoppingCart` и `IngredientAmount`.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='ингредиент'
+    )
+    amount = models.PositiveIntegerField('количество')
+
+    class Meta:
+        verbose_name = 'ингредиент списка покупок'
+        verbose_name_plural = 'ингредиенты списков покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_ingredient'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.ingredient.name} - {self.user.username}'
+
+
+class ShoppingListExport(models.Model):
+    """Задание на выгрузку списка покупок в файл."""
+    PDF = 'pdf'
+    TXT = 'txt'
+    CSV = 'csv'
+    FORMATS = (
+        (PDF, 'PDF'),
+        (TXT, 'текст'),
+        (CSV, 'CSV'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'готово'),
+        (FAILED, 'ошибка'),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_exports',
+        verbose_name='пользователь'
+    )
+    format = models.CharField(
+        'формат', max_length=3, choices=FORMATS, default=PDF
+    )
+    status = models.CharField(
+        'статус', max_length=7, choices=STATUSES, default=PENDING
+    )
+    file = models.FileField('файл', upload_to='exports/', blank=True)
+    error = models.TextField('ошибка', blank=True)
+    created = models.DateTimeField('создано', auto_now_add=True)
+    started = models.DateTimeField('начато', null=True, blank=True)
+    finished = models.DateTimeField('завершено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'выгрузка списка покупок'
+        verbose_name_plural = 'выгрузки списков покупок'
+        indexes = (
+            models.Index(
+                fields=('status', 'id'), name='export_status_id_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user.username} - {self.format} - {self.status}'
+
+
+def initial_generation():
+    # Поколение начинается от времени создания записи, чтобы после
+    # пересоздания базы оно не совпало с ключами, оставшимися в общем кеше.
+    return int(time.time() * 1000)
+
+
+class DataVersion(models.Model):
+    """
+    Версия набора данных (`recipes.cache.RECIPES` и др.) для ключей кеша
+    ответов и заголовков `ETag`/`Last-Modified`. Хранится в базе, поэтому
+    изменения из других процессов и команд видны всем процессам сервера.
+    """
+    name = models.CharField('данные', max_length=50, unique=True)
+    generation = models.PositiveBigIntegerField(
+        'поколение', default=initial_generation
+    )
+    modified = models.DateTimeField('изменено', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'версия данных'
+        verbose_name_plural = 'версии данных'
+
+    def __str__(self):
+        return f'{self.name} - {self.generation}'
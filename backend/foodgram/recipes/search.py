@@ -0,0 +1,189 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'pg_catalog.russian'
+NAME_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+
+POSTGRESQL_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{table}}.name, '')),"
+    f" 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{table}}.text, '')),"
+    f" 'B')"
+)
+POSTGRESQL_INSTALL = (
+    'ALTER TABLE recipes_recipe ADD COLUMN IF NOT EXISTS search_vector '
+    'tsvector',
+    f'''
+    CREATE OR REPLACE FUNCTION recipes_recipe_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {POSTGRESQL_VECTOR.format(table='NEW')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger '
+    'ON recipes_recipe',
+    '''
+    CREATE TRIGGER recipes_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+    FOR EACH ROW EXECUTE PROCEDURE recipes_recipe_search_vector_update()
+    ''',
+    'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+    'ON recipes_recipe USING gin (search_vector)',
+)
+POSTGRESQL_REBUILD = (
+    f'UPDATE recipes_recipe SET search_vector = '
+    f'{POSTGRESQL_VECTOR.format(table="recipes_recipe")}',
+)
+POSTGRESQL_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger '
+    'ON recipes_recipe',
+    'DROP FUNCTION IF EXISTS recipes_recipe_search_vector_update()',
+    'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector',
+)
+
+SQLITE_INSTALL = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5(
+        name, text, content='recipes_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert
+    AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete
+    AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update
+    AFTER UPDATE OF name, text ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO recipes_recipe_fts(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+)
+SQLITE_REBUILD = (
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_insert',
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_delete',
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_update',
+    'DROP TABLE IF EXISTS recipes_recipe_fts',
+)
+
+STATEMENTS = {
+    'postgresql': (
+        POSTGRESQL_INSTALL, POSTGRESQL_REBUILD, POSTGRESQL_UNINSTALL
+    ),
+    'sqlite': (SQLITE_INSTALL, SQLITE_REBUILD, SQLITE_UNINSTALL),
+}
+
+
+def _execute(db_connection, statements):
+    with db_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_search_index(db_connection=connection):
+    """
+    Создаёт полнотекстовый индекс рецептов и триггеры, которые обновляют
+    его при вставке, изменении названия или описания и удалении рецепта,
+    затем заполняет индекс по текущим рецептам.
+    PostgreSQL - столбец `tsvector` с русской морфологией и GIN-индекс,
+    SQLite - таблица FTS5. Повторный вызов безопасен: так индекс
+    восстанавливается, например, после пересоздания таблицы рецептов
+    миграциями SQLite.
+    """
+    if db_connection.vendor not in STATEMENTS:
+        return
+    install, rebuild, _ = STATEMENTS[db_connection.vendor]
+    _execute(db_connection, (*install, *rebuild))
+
+
+def uninstall_search_index(db_connection=connection):
+    """Удаляет полнотекстовый индекс рецептов и его триггеры."""
+    if db_connection.vendor not in STATEMENTS:
+        return
+    _, _, uninstall = STATEMENTS[db_connection.vendor]
+    _execute(db_connection, uninstall)
+
+
+def _get_sqlite_match(query):
+    """
+    Превращает запрос в выражение FTS5: все слова обязательны и ищутся
+    по началу, что частично заменяет отсутствующую в SQLite морфологию.
+    """
+    return ' '.join(
+        '"{}"*'.format(word) for word in re.findall(r'\w+', query.lower())
+    )
+
+
+def search_recipes(queryset, query):
+    """
+    Отбирает рецепты, подходящие под поисковый запрос, и добавляет
+    аннотацию `search_rank`: чем выше значение, тем релевантнее рецепт,
+    совпадения в названии весят больше, чем в описании.
+    Результат упорядочен по убыванию `search_rank`.
+    """
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        queryset = queryset.filter(
+            RawSQL(
+                f'recipes_recipe.search_vector @@ {tsquery}',
+                (query,),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'ts_rank(recipes_recipe.search_vector, {tsquery})',
+                (query,),
+                output_field=FloatField(),
+            )
+        )
+    elif vendor == 'sqlite':
+        match = _get_sqlite_match(query)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(
+            RawSQL(
+                'recipes_recipe.id IN (SELECT rowid FROM recipes_recipe_fts '
+                'WHERE recipes_recipe_fts MATCH %s)',
+                (match,),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'(SELECT -bm25(recipes_recipe_fts, {NAME_WEIGHT}, '
+                f'{TEXT_WEIGHT}) FROM recipes_recipe_fts '
+                f'WHERE recipes_recipe_fts MATCH %s '
+                f'AND rowid = recipes_recipe.id)',
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+    else:
+        return queryset.filter(
+            Q(name__icontains=query) | Q(text__icontains=query)
+        )
+    return queryset.order_by(
+        '-search_rank', *queryset.model._meta.ordering
+    )
@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models import F, Sum
+
+from recipes.models import ShoppingCart, ShoppingListItem
+
+BATCH_SIZE = 1000
+
+
+def get_shopping_list(user):
+    """
+    Возвращает список покупок пользователя: словари с ключами
+    `name`, `amount`, `unit`, упорядоченные по названию.
+    """
+    return user.shopping_list.values(
+        'amount',
+        name=F('ingredient__name'),
+        unit=F('ingredient__measurement_unit'),
+    ).order_by('name')
+
+
+def _get_totals(carts):
+    """Суммирует количество ингредиентов рецептов из списков покупок."""
+    return carts.values(
+        'user_id',
+        ingredient_id=F('recipe__ingredient_amounts__ingredient_id'),
+    ).annotate(
+        total=Sum('recipe__ingredient_amounts__amount')
+    ).filter(total__isnull=False).order_by()
+
+
+@transaction.atomic
+def refresh_shopping_lists(user_ids, ingredient_ids):
+    """
+    Пересчитывает строки `ShoppingListItem` для пар (пользователь,
+    ингредиент) по текущему содержимому `ShoppingCart`. Пересчёт
+    затрагивает только переданные пары, поэтому не зависит от порядка,
+    в котором удаляются связанные записи.
+    """
+    user_ids, ingredient_ids = set(user_ids), set(ingredient_ids)
+    if not user_ids or not ingredient_ids:
+        return
+    ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=ingredient_ids
+    ).delete()
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=row['user_id'],
+            ingredient_id=row['ingredient_id'],
+            amount=row['total'],
+        )
+        for row in _get_totals(
+            ShoppingCart.objects.filter(
+                user_id__in=user_ids,
+                recipe__ingredient_amounts__ingredient_id__in=ingredient_ids,
+            )
+        )
+    )
+
+
+def refresh_recipe_shopping_lists(recipe_id, ingredient_ids):
+    """
+    Пересчитывает списки покупок всех пользователей, у которых в корзине
+    есть рецепт, для изменённых ингредиентов этого рецепта.
+    """
+    refresh_shopping_lists(
+        ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True),
+        ingredient_ids,
+    )
+
+
+@transaction.atomic
+def rebuild_shopping_lists(user_ids=None):
+    """
+    Полностью перестраивает `ShoppingListItem` для переданных
+    пользователей или для всех, если `user_ids` не указан.
+    Возвращает количество созданных строк.
+    """
+    items = ShoppingListItem.objects.all()
+    carts = ShoppingCart.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+        carts = carts.filter(user_id__in=user_ids)
+    items.delete()
+    created = ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=row['user_id'],
+                ingredient_id=row['ingredient_id'],
+                amount=row['total'],
+            )
+            for row in _get_totals(carts).iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return len(created)
@@ -0,0 +1,85 @@
+import csv
+import os
+
+from functools import lru_cache
+
+import reportlab.rl_config
+
+from django.conf import settings
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+reportlab.rl_config.TTFSearchPath.append(
+    str(os.path.join(settings.STATIC_ROOT, 'ttfonts'))
+)
+
+PDF_FONT = 'Arial'
+PDF_TITLE_HEIGHT = 800
+PDF_FIRST_LINE_HEIGHT = 750
+PDF_LINE_STEP = 25
+PDF_BOTTOM_MARGIN = 50
+
+
+@lru_cache(maxsize=None)
+def register_pdf_font():
+    """Регистрирует шрифт для PDF один раз за время жизни процесса."""
+    pdfmetrics.registerFont(TTFont(PDF_FONT, 'arial.ttf', 'UTF-8'))
+
+
+def get_shopping_cart_pdf(shopping_cart_queryset, writable_object):
+    """
+    Создаёт PDF файл с данными перданного queryset.
+    Каждый объект queryset имеет ключи: `name`, `amount`, `unit`.
+    Строки, не поместившиеся на страницу, переносятся на следующую.
+    """
+    register_pdf_font()
+    page = canvas.Canvas(writable_object)
+    page.setFont(PDF_FONT, size=24)
+    page.drawString(200, PDF_TITLE_HEIGHT, 'Список ингредиентов')
+    page.setFont(PDF_FONT, size=16)
+    height = PDF_FIRST_LINE_HEIGHT
+    for i, item in enumerate(shopping_cart_queryset, 1):
+        if height < PDF_BOTTOM_MARGIN:
+            page.showPage()
+            page.setFont(PDF_FONT, size=16)
+            height = PDF_TITLE_HEIGHT
+        page.drawString(
+            75,
+            height,
+            (
+                f"{i}.  {item['name']} - {item['amount']} {item['unit']}"
+            ),
+        )
+        height -= PDF_LINE_STEP
+    page.showPage()
+    page.save()
+    return writable_object
+
+
+class _EchoBuffer:
+    """Буфер, который сразу возвращает записанное `csv.writer` значение."""
+
+    def write(self, value):
+        return value
+
+
+def iter_shopping_cart_txt(shopping_cart_queryset):
+    """
+    Построчно отдаёт список покупок в текстовом виде.
+    Каждый объект queryset имеет ключи: `name`, `amount`, `unit`.
+    """
+    yield 'Список ингредиентов\n\n'
+    for i, item in enumerate(shopping_cart_queryset, 1):
+        yield f"{i}.  {item['name']} - {item['amount']} {item['unit']}\n"
+
+
+def iter_shopping_cart_csv(shopping_cart_queryset):
+    """
+    Построчно отдаёт список покупок в формате CSV.
+    Каждый объект queryset имеет ключи: `name`, `amount`, `unit`.
+    """
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for item in shopping_cart_queryset:
+        yield writer.writerow((item['name'], item['amount'], item['unit']))
@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from recipes.cache import INGREDIENTS, RECIPES, TAGS, bump_generation
+from recipes.favorites import change_favorites_count
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (
+    Favorites, Ingredient, IngredientAmount, Recipe, RecipeTags, ShoppingCart,
+    Tag,
+)
+from recipes.shopping_list import (
+    refresh_recipe_shopping_lists, refresh_shopping_lists,
+)
+from recipes.tag_slugs import tag_slug_map
+
+User = get_user_model()
+# Поля автора, которые входят в карточки рецептов.
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    """Сбрасывает индекс поиска ингредиентов при их изменении."""
+    ingredient_index.invalidate()
+    bump_generation(INGREDIENTS, RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tag_slug_map(sender, **kwargs):
+    """Сбрасывает соответствие `slug` -> `id` тэгов при их изменении."""
+    tag_slug_map.invalidate()
+    bump_generation(TAGS, RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientAmount)
+@receiver((post_save, post_delete), sender=RecipeTags)
+def invalidate_recipes_cache(sender, **kwargs):
+    """Делает устаревшими закешированные ответы с рецептами."""
+    bump_generation(RECIPES)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, created, update_fields=None, **kwargs):
+    """
+    Делает устаревшими закешированные рецепты при изменении данных
+    автора, которые в них выводятся. Новый пользователь рецептов ещё
+    не имеет, а сохранение только `last_login` при входе данные рецептов
+    не меняет.
+    """
+    if created or (
+        update_fields is not None and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    bump_generation(RECIPES)
+
+
+@receiver(post_save, sender=Favorites)
+def increment_favorites_count(sender, instance, created, **kwargs):
+    """
+    Увеличивает счётчик добавлений рецепта в избранное.
+    Поколение рецептов не меняется: иначе каждое добавление в избранное
+    сбрасывало бы все закешированные ответы с рецептами. Счётчик
+    в закешированных ответах устаревает не дольше чем на
+    `RESPONSE_CACHE_TIMEOUT`.
+    """
+    if created:
+        change_favorites_count(instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=Favorites)
+def decrement_favorites_count(sender, instance, **kwargs):
+    """
+    Уменьшает счётчик добавлений рецепта в избранное,
+    не меняя поколение рецептов.
+    """
+    change_favorites_count(instance.recipe_id, -1)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remember_cart_ingredients(sender, instance, **kwargs):
+    """
+    Запоминает ингредиенты рецепта до удаления: при каскадном удалении
+    рецепта его ингредиенты могут быть удалены раньше корзины.
+    """
+    instance.ingredient_ids = list(
+        IngredientAmount.objects.filter(
+            recipe_id=instance.recipe_id
+        ).values_list('ingredient_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Добавляет ингредиенты рецепта в список покупок пользователя."""
+    refresh_shopping_lists(
+        (instance.user_id,),
+        IngredientAmount.objects.filter(
+            recipe_id=instance.recipe_id
+        ).values_list('ingredient_id', flat=True),
+    )
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    """Убирает ингредиенты рецепта из списка покупок пользователя."""
+    refresh_shopping_lists((instance.user_id,), instance.ingredient_ids)
+
+
+@receiver(pre_save, sender=IngredientAmount)
+def remember_replaced_ingredient(sender, instance, **kwargs):
+    """Запоминает прежний ингредиент изменяемой записи."""
+    instance.replaced_ingredient_ids = ()
+    if instance.pk is not None:
+        instance.replaced_ingredient_ids = tuple(
+            IngredientAmount.objects.filter(
+                pk=instance.pk
+            ).values_list('ingredient_id', flat=True)
+        )
+
+
+@receiver((post_save, post_delete), sender=IngredientAmount)
+def refresh_ingredient_shopping_lists(sender, instance, **kwargs):
+    """Обновляет списки покупок при изменении ингредиентов рецепта."""
+    refresh_recipe_shopping_lists(
+        instance.recipe_id,
+        (
+            instance.ingredient_id,
+            *getattr(instance, 'replaced_ingredient_ids', ()),
+        )
+    )
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+
+
+class TagSlugMap:
+    """
+    Соответствие `slug` -> `id` тэгов в памяти процесса.
+    Сбрасывается сигналами сохранения и удаления `Tag` и перечитывается
+    не реже, чем раз в `TAG_SLUG_MAP_TTL` секунд. Слаги `slugs`, которых
+    нет в карте (например, тэг создан другим процессом), ищутся в базе
+    одним запросом и добавляются в карту.
+    """
+
+    def __init__(self):
+        self._state = None
+
+    def invalidate(self):
+        self._state = None
+
+    def get(self, slugs=()):
+        from recipes.models import Tag
+
+        state = self._state
+        if (
+            state is None
+            or time.monotonic() - state[0] > settings.TAG_SLUG_MAP_TTL
+        ):
+            state = self._state = (
+                time.monotonic(),
+                dict(Tag.objects.values_list('slug', 'id')),
+            )
+        missing = set(slugs).difference(state[1])
+        if missing:
+            state[1].update(
+                Tag.objects.filter(slug__in=missing).values_list('slug', 'id')
+            )
+        return state[1]
+
+
+tag_slug_map = TagSlugMap()
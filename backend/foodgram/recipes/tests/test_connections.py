@@ -0,0 +1,35 @@
+from django.db import connection
+
+from recipes.connections import close_unusable_connections
+
+
+def test_recently_used_connection_is_not_checked(
+    transactional_db, settings, monkeypatch
+):
+    """
+    Соединение проверяется при первом использовании и после простоя
+    дольше `CONN_HEALTH_CHECK_IDLE`, но не перед каждым запросом.
+    """
+    settings.CONN_HEALTH_CHECK_IDLE = 30
+    monkeypatch.setitem(connection.settings_dict, 'CONN_HEALTH_CHECKS', True)
+    checks = []
+    monkeypatch.setattr(
+        connection, 'is_usable', lambda: checks.append(1) or True
+    )
+    connection.ensure_connection()
+    monkeypatch.delattr(connection, 'health_check_used', raising=False)
+    close_unusable_connections()
+    close_unusable_connections()
+    assert len(checks) == 1
+    close_unusable_connections(idle=0)
+    assert len(checks) == 2
+
+
+def test_unusable_connection_is_closed(transactional_db, monkeypatch):
+    monkeypatch.setitem(connection.settings_dict, 'CONN_HEALTH_CHECKS', True)
+    monkeypatch.setattr(connection, 'is_usable', lambda: False)
+    closed = []
+    monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+    connection.ensure_connection()
+    close_unusable_connections(idle=0)
+    assert closed
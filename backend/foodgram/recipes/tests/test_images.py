@@ -0,0 +1,59 @@
+from recipes.images import get_image_names
+from recipes.models import Recipe
+
+
+def test_replacing_image_saves_derivatives_and_deletes_old_files(
+    django_capture_on_commit_callbacks, recipes, new_image
+):
+    """
+    Копии нового изображения сохраняются вместе с ним при `update_fields`,
+    прежние файлы удаляются после фиксации транзакции.
+    """
+    recipe = Recipe.objects.get(pk=recipes[0].pk)
+    old_names = get_image_names(recipe)
+    storage = recipe.image.storage
+    recipe.image = new_image
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.save(update_fields=('image',))
+    saved = get_image_names(Recipe.objects.get(pk=recipe.pk))
+    assert saved == get_image_names(recipe)
+    for field, name in old_names.items():
+        assert saved[field] != name
+        assert not storage.exists(name)
+        assert storage.exists(saved[field])
+
+
+def test_shared_image_is_kept(
+    django_capture_on_commit_callbacks, recipes, new_image
+):
+    """Файлы, на которые ссылается другой рецепт, не удаляются."""
+    first, second = (
+        Recipe.objects.get(pk=recipe.pk) for recipe in recipes[:2]
+    )
+    Recipe.objects.filter(pk=second.pk).update(
+        **get_image_names(first)
+    )
+    old_names = get_image_names(first)
+    first.image = new_image
+    with django_capture_on_commit_callbacks(execute=True):
+        first.save()
+    for name in old_names.values():
+        assert first.image.storage.exists(name)
+
+
+def test_save_without_image_change_skips_derivatives(recipes):
+    """
+    Рецепт без копий и с недоступным файлом изображения сохраняется:
+    копии создаются только для нового изображения.
+    """
+    recipe = recipes[0]
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image='recipes/missing.png', image_card='',
+        image_thumbnail='', image_card_webp='',
+    )
+    recipe = Recipe.objects.get(pk=recipe.pk)
+    recipe.name = 'новое название'
+    recipe.save()
+    recipe = Recipe.objects.get(pk=recipe.pk)
+    assert recipe.name == 'новое название'
+    assert not recipe.image_card
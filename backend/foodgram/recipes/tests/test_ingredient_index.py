@@ -0,0 +1,22 @@
+from recipes.cache import INGREDIENTS, bump_generation
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+
+def test_index_follows_database_generation(db):
+    """
+    Ингредиент, добавленный другим процессом (без сигналов этого
+    процесса), появляется в поиске после смены поколения.
+    """
+    Ingredient.objects.create(name='мука', measurement_unit='г')
+    assert [entry['name'] for entry in ingredient_index.search('му')] == [
+        'мука'
+    ]
+    Ingredient.objects.bulk_create(
+        [Ingredient(name='мускат', measurement_unit='г')]
+    )
+    assert len(ingredient_index.search('му')) == 1
+    bump_generation(INGREDIENTS)
+    assert [entry['name'] for entry in ingredient_index.search('му')] == [
+        'мука', 'мускат'
+    ]
@@ -45,6 +45,9 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author')),
             ),
         )
+        indexes = (
+            models.Index(fields=('user', '-id'), name='follow_user_id_idx'),
+        )
 
     def __str__(self):
         return f'{self.author.username} - {self.user.username}'